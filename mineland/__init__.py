@@ -3,12 +3,21 @@ MineLand Library
 '''
 
 from .tasks import make
+from .tasks import make_vec
+from .tasks import list_tasks
 
 from .sim import MineLand
+from .sim import VectorMineLand
+from .sim import ServerPool
+from .sim import Profiler, HistogramSink, CSVSink, ChromeTraceSink
+from .sim import SoundRegistry
+from .sim import StructuredObservationWrapper
 
 from .sim import Action
 from .sim import LowLevelAction
+from .sim import LowLevelActionBatch
 from .sim import Observation
+from .sim import BlockTable
 from .sim import CodeInfo
 from .sim import Event
 from .sim import TaskInfo
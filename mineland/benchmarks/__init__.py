@@ -0,0 +1,15 @@
+'''
+Throughput benchmarks of the simulator.
+
+Run `python -m mineland.benchmarks --help` for usage.
+'''
+
+from .cases import BenchmarkCase
+from .cases import SUITES
+from .cases import get_suite
+from .runner import run_case
+from .runner import run_suite
+from .runner import save_results
+from .runner import load_results
+from .compare import compare
+from .compare import format_regressions
@@ -0,0 +1,51 @@
+'''
+Run the benchmarks from the command line.
+
+Example:
+    python -m mineland.benchmarks --suite quick --output results.json
+    python -m mineland.benchmarks --suite quick --output results.json --baseline baseline.json
+    python -m mineland.benchmarks --compare results.json --baseline baseline.json
+
+The exit code is 1 if any regression is found against the baseline.
+'''
+
+import argparse
+import sys
+
+from .cases import SUITES, get_suite
+from .runner import run_suite, save_results, load_results
+from .compare import compare, format_regressions
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m mineland.benchmarks", description="MineLand simulator throughput benchmarks.")
+    parser.add_argument("--suite", default="quick", choices=list(SUITES), help="The cases to run.")
+    parser.add_argument("--steps", type=int, default=None, help="Override the number of measured steps of each case.")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where the results are saved.")
+    parser.add_argument("--baseline", default=None, help="The results to compare against.")
+    parser.add_argument("--compare", default=None, metavar="RESULTS", help="Compare saved results against the baseline without running.")
+    parser.add_argument("--tolerance", type=float, default=None, help="The relative change allowed for all metrics, e.g. 0.1.")
+    parser.add_argument("--no-reuse-server", action="store_true", help="Start a new server for each case.")
+    parser.add_argument("--server-max-memory", default="8G")
+    args = parser.parse_args()
+
+    if args.compare is not None:
+        if args.baseline is None:
+            parser.error("--baseline is required by --compare.")
+        results = load_results(args.compare)
+    else:
+        cases = get_suite(args.suite)
+        if args.steps is not None:
+            for case in cases:
+                case.steps = args.steps
+        results = run_suite(cases, reuse_server=not args.no_reuse_server, server_max_memory=args.server_max_memory)
+        save_results(results, args.output)
+        print(f"Results are saved to {args.output}")
+
+    if args.baseline is not None:
+        regressions = compare(results, load_results(args.baseline), tolerance=args.tolerance)
+        print(format_regressions(regressions))
+        if len(regressions) > 0:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+'''
+The configurations measured by the benchmarks.
+'''
+
+from typing import Dict, List, Tuple
+
+class BenchmarkCase:
+    def __init__(
+        self,
+        agents_count: int = 1,
+        ticks_per_step: int = 5,
+        headless: bool = True,
+        image_size: Tuple[int, int] = (144, 256),
+        enable_low_level_action: bool = False,
+        enable_auto_pause: bool = False,
+        steps: int = 100,
+        warmup_steps: int = 10,
+        name: str = None,
+    ):
+        '''
+        A configuration of MineLand to be measured.
+
+        Args:
+            agents_count (int): The number of agents.
+            ticks_per_step (int): The ticks of each step.
+            headless (bool): If False, rgb frames are rendered and sent.
+            image_size (Tuple[int, int]): The size of rgb, (height, width). Ignored in headless mode.
+            enable_low_level_action (bool): If True, LowLevelActionBatch.no_op is sent, otherwise Action.no_op.
+            enable_auto_pause (bool): Whether the server is paused between steps.
+            steps (int): The number of measured steps.
+            warmup_steps (int): The number of steps before measuring, which are not counted.
+            name (str): The name of the case. Default is generated from the configuration.
+        '''
+        self.agents_count = agents_count
+        self.ticks_per_step = ticks_per_step
+        self.headless = headless
+        self.image_size = tuple(image_size)
+        self.enable_low_level_action = enable_low_level_action
+        self.enable_auto_pause = enable_auto_pause
+        self.steps = steps
+        self.warmup_steps = warmup_steps
+        self.name = name if name is not None else self.default_name()
+
+    def default_name(self) -> str:
+        rgb = "headless" if self.headless else f"rgb{self.image_size[0]}x{self.image_size[1]}"
+        action = "low" if self.enable_low_level_action else "high"
+        name = f"agents{self.agents_count}_ticks{self.ticks_per_step}_{rgb}_{action}"
+        if self.enable_auto_pause:
+            name += "_pause"
+        return name
+
+    def __str__(self):
+        return f"BenchmarkCase({self.name})"
+
+    def to_json(self) -> Dict:
+        return {
+            "name": self.name,
+            "agents_count": self.agents_count,
+            "ticks_per_step": self.ticks_per_step,
+            "headless": self.headless,
+            "image_size": list(self.image_size),
+            "enable_low_level_action": self.enable_low_level_action,
+            "enable_auto_pause": self.enable_auto_pause,
+            "steps": self.steps,
+            "warmup_steps": self.warmup_steps,
+        }
+
+    @staticmethod
+    def from_json(data: Dict):
+        return BenchmarkCase(**data)
+
+# ===== Suites =====
+
+def _agents_suite() -> List[BenchmarkCase]:
+    return [BenchmarkCase(agents_count=n) for n in [1, 2, 4, 8, 16, 32, 64]]
+
+def _ticks_suite() -> List[BenchmarkCase]:
+    return [BenchmarkCase(ticks_per_step=t) for t in [1, 5, 10, 20]]
+
+def _rgb_suite() -> List[BenchmarkCase]:
+    return [BenchmarkCase(agents_count=n, headless=headless) for n in [1, 4] for headless in [True, False]]
+
+def _image_size_suite() -> List[BenchmarkCase]:
+    return [BenchmarkCase(headless=False, image_size=size) for size in [(72, 128), (144, 256), (288, 512)]]
+
+def _action_suite() -> List[BenchmarkCase]:
+    return [BenchmarkCase(agents_count=n, enable_low_level_action=low) for n in [1, 8] for low in [False, True]]
+
+def _quick_suite() -> List[BenchmarkCase]:
+    return [
+        BenchmarkCase(agents_count=1),
+        BenchmarkCase(agents_count=8),
+        BenchmarkCase(agents_count=1, headless=False),
+        BenchmarkCase(agents_count=1, enable_low_level_action=True),
+    ]
+
+def _full_suite() -> List[BenchmarkCase]:
+    cases = {}
+    for suite in [_agents_suite, _ticks_suite, _rgb_suite, _image_size_suite, _action_suite]:
+        for case in suite():
+            cases.setdefault(case.name, case)
+    return list(cases.values())
+
+SUITES = {
+    "quick": _quick_suite,
+    "agents": _agents_suite,
+    "ticks_per_step": _ticks_suite,
+    "rgb": _rgb_suite,
+    "image_size": _image_size_suite,
+    "action": _action_suite,
+    "full": _full_suite,
+}
+
+def get_suite(name: str) -> List[BenchmarkCase]:
+    if name not in SUITES:
+        raise ValueError(f"Invalid suite: {name}, must be one of {', '.join(SUITES)}.")
+    return SUITES[name]()
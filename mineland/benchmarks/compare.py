@@ -0,0 +1,110 @@
+'''
+Compare benchmark results against a baseline to find performance regressions.
+'''
+
+from typing import Dict, List
+
+# metric -> True if higher is better
+METRICS = {
+    "steps_per_sec": True,
+    "ticks_per_sec": True,
+    "step_latency_p50_ms": False,
+    "step_latency_p99_ms": False,
+    "reset_time_s": False,
+    "payload_bytes_per_step": False,
+    "python_rss_mb": False,
+    "server_rss_mb": False,
+    "mineflayer_rss_mb": False,
+}
+
+# The relative change allowed before a metric is regarded as a regression.
+# Tail latency and reset time are noisier than the others.
+DEFAULT_TOLERANCES = {
+    "step_latency_p99_ms": 0.25,
+    "reset_time_s": 0.25,
+    "server_rss_mb": 0.2,
+}
+DEFAULT_TOLERANCE = 0.1
+
+def compare(results: Dict, baseline: Dict, tolerance: float = None) -> List[Dict]:
+    '''
+    Compare the metrics of the cases which exist in both results and baseline, matched by case name.
+    A case of the baseline which failed or is missing in results is also a regression,
+    whose metric is "error" or "missing".
+
+    Args:
+        results (Dict): The results returned by run_suite() or load_results().
+        baseline (Dict): The baseline results in the same format.
+        tolerance (float): The relative change allowed for all metrics, e.g. 0.1 means 10%.
+                           Default is DEFAULT_TOLERANCES, or DEFAULT_TOLERANCE for other metrics.
+
+    Returns:
+        List[Dict]: The regressions, each is {case, metric, baseline, value, change}.
+                    change is the relative change, positive means worse.
+                    For "error" and "missing", baseline, value and change are None, and "error" has the error message.
+    '''
+    baseline_metrics = {
+        result["case"]["name"]: result["metrics"]
+        for result in baseline["results"]
+        if "metrics" in result
+    }
+
+    regressions = []
+    names = set()
+    for result in results["results"]:
+        name = result["case"]["name"]
+        names.add(name)
+        if name not in baseline_metrics:
+            continue
+        if "metrics" not in result:
+            regressions.append({
+                "case": name,
+                "metric": "error",
+                "baseline": None,
+                "value": None,
+                "change": None,
+                "error": result.get("error"),
+            })
+            continue
+        for metric, is_higher_better in METRICS.items():
+            value = result["metrics"].get(metric)
+            base = baseline_metrics[name].get(metric)
+            if value is None or base is None or base == 0:
+                continue
+            change = (value - base) / base
+            if is_higher_better:
+                change = -change
+            allowed = tolerance if tolerance is not None else DEFAULT_TOLERANCES.get(metric, DEFAULT_TOLERANCE)
+            if change > allowed:
+                regressions.append({
+                    "case": name,
+                    "metric": metric,
+                    "baseline": base,
+                    "value": value,
+                    "change": change,
+                })
+
+    for name in baseline_metrics:
+        if name not in names:
+            regressions.append({
+                "case": name,
+                "metric": "missing",
+                "baseline": None,
+                "value": None,
+                "change": None,
+            })
+    return regressions
+
+def format_regressions(regressions: List[Dict]) -> str:
+    if len(regressions) == 0:
+        return "No regression."
+    lines = [f"{len(regressions)} regression(s):"]
+    for r in regressions:
+        if r["metric"] == "error":
+            lines.append(f"  {r['case']} failed: {r['error']}")
+            continue
+        if r["metric"] == "missing":
+            lines.append(f"  {r['case']} is missing")
+            continue
+        lines.append(f"  {r['case']} {r['metric']}: {r['baseline']:.3f} -> {r['value']:.3f} ({r['change'] * 100:+.1f}% worse)")
+    return "\n".join(lines)
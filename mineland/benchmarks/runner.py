@@ -0,0 +1,188 @@
+'''
+Run the benchmark cases and save the results as json.
+'''
+
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from .cases import BenchmarkCase
+from ..sim import MineLand
+from ..sim import ServerPool
+from ..sim import HistogramSink
+from ..sim import Action
+from ..sim import LowLevelActionBatch
+from ..utils import white_text, red_text
+
+std_print = print
+def print(*args, end='\n'):
+    text = [white_text(str(arg)) for arg in args]
+    std_print("[Benchmark]", *text, end=end)
+def print_error(*args, end='\n'):
+    text = [red_text(str(arg)) for arg in args]
+    std_print("[Benchmark]", *text, end=end)
+
+RESULTS_VERSION = 1
+
+def _rss_mb(pid: int) -> float:
+    '''
+    Get the resident memory of a process in MB, or None if it's unavailable (e.g. not on Linux).
+    '''
+    try:
+        with open(f"/proc/{pid}/status", 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+def _process_rss_mb(manager) -> float:
+    if manager is None or manager.process is None:
+        return None
+    return _rss_mb(manager.process.pid)
+
+def run_case(case: BenchmarkCase, server_pool: ServerPool = None, **env_kwargs) -> Dict:
+    '''
+    Measure a case in a new MineLand.
+
+    Args:
+        case (BenchmarkCase): The case.
+        server_pool (ServerPool): If provided, the server is leased from the pool instead of being started,
+                                  so that reset_time_s doesn't include the startup of the server.
+        env_kwargs: Other arguments passed to MineLand, e.g. server_max_memory.
+
+    Returns:
+        Dict: {"case": case.to_json(), "metrics": {...}}, times are in seconds or milliseconds as their names say.
+    '''
+    print(f"Running {case.name}...")
+    sink = HistogramSink()
+    env = MineLand(
+        agents_count=case.agents_count,
+        ticks_per_step=case.ticks_per_step,
+        headless=case.headless,
+        image_size=case.image_size,
+        enable_low_level_action=case.enable_low_level_action,
+        enable_auto_pause=case.enable_auto_pause,
+        server_pool=server_pool,
+        is_printing_server_info=False,
+        is_printing_mineflayer_info=False,
+        profile=True,
+        profile_sinks=[sink],
+        **env_kwargs,
+    )
+    try:
+        reset_start_time = time.perf_counter()
+        env.reset()
+        reset_time = time.perf_counter() - reset_start_time
+
+        if case.enable_low_level_action:
+            action = LowLevelActionBatch.no_op(case.agents_count)
+        else:
+            action = Action.no_op(case.agents_count)
+
+        for _ in range(case.warmup_steps):
+            env.step(action)
+        sink.clear()
+
+        latencies = []
+        start_time = time.perf_counter()
+        for _ in range(case.steps):
+            step_start_time = time.perf_counter()
+            env.step(action)
+            latencies.append(time.perf_counter() - step_start_time)
+        total_time = time.perf_counter() - start_time
+
+        # The bytes of responses from mineflayer, recorded by the profiler for each endpoint
+        payload_bytes = sum(stats["size_total"] for name, stats in sink.stats.items() if name.startswith("/"))
+        latencies_ms = np.array(latencies) * 1000
+
+        metrics = {
+            "steps_per_sec": case.steps / total_time,
+            "ticks_per_sec": case.steps * case.ticks_per_step / total_time,
+            "step_latency_mean_ms": float(latencies_ms.mean()),
+            "step_latency_p50_ms": float(np.percentile(latencies_ms, 50)),
+            "step_latency_p99_ms": float(np.percentile(latencies_ms, 99)),
+            "reset_time_s": reset_time,
+            "payload_bytes_per_step": payload_bytes / case.steps,
+            "python_rss_mb": _rss_mb(os.getpid()),
+            "server_rss_mb": _process_rss_mb(env.server_manager),
+            "mineflayer_rss_mb": _process_rss_mb(env.bridge.mineflayer_manager),
+        }
+        print(f"{case.name}: {metrics['steps_per_sec']:.2f} steps/s, p50 {metrics['step_latency_p50_ms']:.1f} ms, p99 {metrics['step_latency_p99_ms']:.1f} ms")
+        return {"case": case.to_json(), "metrics": metrics}
+    finally:
+        if env.is_reset:
+            env.close()
+        elif env.pooled_server is not None:
+            # reset() failed, close() can't be used, but the leased server must still be returned for the next cases
+            try:
+                # Disconnect the bots that have joined
+                env.bridge.close(shutdown_mineflayer=False)
+            except Exception as e:
+                print_error(f"Failed to disconnect the bots of {case.name}: {e}")
+            if env.enable_auto_pause:
+                # Undo the pause of MineLand.__init__, as close() does
+                env.server_manager.execute("pause")
+            server_pool.release(env.pooled_server)
+
+def run_suite(cases: List[BenchmarkCase], reuse_server: bool = True, **env_kwargs) -> Dict:
+    '''
+    Measure the cases one by one. A case which fails is recorded with its error, and the others still run.
+
+    Args:
+        cases (List[BenchmarkCase]): The cases.
+        reuse_server (bool): If True, all cases share a server from a ServerPool of size 1.
+        env_kwargs: Other arguments passed to MineLand.
+
+    Returns:
+        Dict: {"version", "meta", "results"}, which can be saved by save_results().
+    '''
+    server_pool = None
+    if reuse_server:
+        server_config = {}
+        if "server_max_memory" in env_kwargs:
+            server_config["max_memory"] = env_kwargs.pop("server_max_memory")
+        server_pool = ServerPool(size=1, **server_config)
+
+    results = []
+    try:
+        for case in cases:
+            try:
+                results.append(run_case(case, server_pool=server_pool, **env_kwargs))
+            except Exception as e:
+                print_error(f"{case.name} failed: {e}")
+                results.append({"case": case.to_json(), "error": str(e)})
+    finally:
+        if server_pool is not None:
+            server_pool.close()
+
+    return {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "reuse_server": reuse_server,
+        },
+        "results": results,
+    }
+
+def save_results(results: Dict, path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+def load_results(path: str) -> Dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        results = json.load(f)
+    if results.get("version") != RESULTS_VERSION:
+        raise ValueError(f"Unsupported version of benchmark results: {results.get('version')} in {path}, expected {RESULTS_VERSION}.")
+    return results
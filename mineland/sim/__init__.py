@@ -1,7 +1,15 @@
 from .sim import MineLand
+from .vector_sim import VectorMineLand
+from .server_pool import ServerPool
+from .profiler import Profiler, HistogramSink, CSVSink, ChromeTraceSink
+from .sound_registry import SoundRegistry
+from .structured_observation import StructuredObservation
+from .structured_observation import StructuredObservationWrapper
 from .data import Action
 from .data import LowLevelAction
+from .data import LowLevelActionBatch
 from .data import Observation
+from .data import BlockTable
 from .data import CodeInfo
 from .data import Event
 from .data import TaskInfo
\ No newline at end of file
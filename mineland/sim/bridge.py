@@ -1,16 +1,52 @@
 from typing import Tuple, List, Dict, Union
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import numpy as np
 import requests
+import asyncio
+import base64
+import json
+import threading
 import time
 
+has_aiohttp = False
+try:
+    import aiohttp
+    has_aiohttp = True
+except ImportError:
+    pass
+
 from .mineflayer_manager import MineflayerManager
 from .server_manager import ServerManager
 from .data.action import Action
-from .data.low_level_action import LowLevelAction
+from .data.low_level_action import LowLevelAction, LowLevelActionBatch
+from .profiler import Profiler
+from .codec import get_json_decoder, check_wire_format, encode_msgpack, decode_msgpack, MSGPACK_TYPE
 from .data.observation import Observation
+from .data.block_table import BlockTable
 from .data.code_info import CodeInfo
 from .data.event import Event
+from ..utils import bytes_to_image
+
+class AsyncResponse:
+    '''
+    A minimal requests.Response-like object of an async request.
+    '''
+    def __init__(self, status_code: int, headers, content: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content)
 
 class Bridge:
+    # Fields of observations which are omitted by mineflayer in delta mode if unchanged, refer to index.js
+    DELTA_FIELDS = ["equipment", "equip", "inventory_all", "inventory", "difficulty", "control_state"]
+
+    # Seconds to wait for the runtick command to finish, observations are got anyway after that
+    RUNTICK_TIMEOUT = 60
+
     def __init__(
         self,
 
@@ -20,6 +56,15 @@ class Bridge:
         ticks_per_step: int,
         enable_auto_pause: bool,
         enable_low_level_action: bool,
+        enable_fused_step: bool,
+        enable_binary_rgb: bool,
+        rgb_decode_mode: str,
+        enable_compact_voxels: bool,
+        voxel_radius: int,
+        enable_delta_observation: bool,
+        json_decoder: str,
+        wire_format: str,
+        profiler: Profiler,
 
         minecraft_server_host: str,
         minecraft_server_port: int,
@@ -33,6 +78,8 @@ class Bridge:
         mineflayer_host: str = "localhost",
         mineflayer_port: int = 21301,
         request_timeout: float = 3000,
+        pool_size: int = 4,
+        max_retries: int = 3,
     ):
         self.mineflayer_manager = mineflayer_manager
         self.server_manager = server_manager
@@ -42,6 +89,30 @@ class Bridge:
         self.ticks_per_step = ticks_per_step
         self.enable_auto_pause = enable_auto_pause
         self.enable_low_level_action = enable_low_level_action
+        self.enable_fused_step = enable_fused_step
+        # Frames are always raw bytes in msgpack, so that they are carried as bins instead of base64 strings
+        self.enable_binary_rgb = (enable_binary_rgb or wire_format == "msgpack") and not headless
+        self.rgb_decode_mode = rgb_decode_mode
+        self.enable_compact_voxels = enable_compact_voxels
+        self.voxel_radius = voxel_radius
+        self.enable_delta_observation = enable_delta_observation
+        self.json_loads = get_json_decoder(json_decoder)
+
+        # Seconds waited for the runtick of the last step, 0 if the server isn't driven by runtick
+        self.last_runtick_wait = 0.0
+        # The id of the last runtick sent by the fused /step, refer to _forward_runtick_finish
+        self.runtick_id = 0
+
+        # With wire_format="msgpack", responses are requested in msgpack by the Accept header,
+        # and requests are sent in msgpack after mineflayer has responded in msgpack (it supports msgpack).
+        check_wire_format(wire_format)
+        self.wire_format = wire_format
+        self.is_msgpack_accepted = False
+
+        self.profiler = profiler
+
+        # The last received DELTA_FIELDS of each agent, which are patched into delta observations
+        self.observation_state = []
 
         self.agents_count = agents_count
         self.agents_config = agents_config
@@ -58,81 +129,423 @@ class Bridge:
 
         self.camera_set = set()
 
+        # The block table of the minecraft version, fetched on the first use
+        self.block_table = None
+
+        # ===== HTTP Session =====
+        # All requests share one keep-alive connection pool to the mineflayer server.
+        # Only connection errors are retried, since a request which has reached
+        # mineflayer (e.g. /step_pre) must not be executed twice.
+        self.pool_size = pool_size
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=max_retries, connect=max_retries, read=0, status=0, backoff_factor=0.1),
+        )
+        self.session.mount("http://", adapter)
+
+        # aiohttp session of the async API, created in the running event loop on the first async request
+        self.async_session = None
+
+        # endpoint -> {"count", "total", "max"}, in seconds
+        self.latency_stats = {}
+
+    def _post(self, endpoint: str, json: Dict = None) -> requests.Response:
+        '''
+        Post a request to the mineflayer server through the pooled session,
+        and record the latency of the endpoint.
+        '''
+        start_time = time.perf_counter()
+        res = self.session.post(
+            f"{self.mineflayer_host_port}{endpoint}",
+            timeout=self.request_timeout,
+            **self._body_kwargs(json),
+        )
+        self._record_latency(endpoint, start_time, time.perf_counter() - start_time, len(res.content))
+        return res
+
+    async def _apost(self, endpoint: str, json: Dict = None) -> Union[requests.Response, AsyncResponse]:
+        '''
+        Post a request to the mineflayer server without blocking the event loop.
+        aiohttp is used if it's installed, otherwise the request is sent in a thread.
+        '''
+        if not has_aiohttp:
+            return await asyncio.to_thread(self._post, endpoint, json)
+
+        if self.async_session is None:
+            self.async_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+            )
+        start_time = time.perf_counter()
+        async with self.async_session.post(f"{self.mineflayer_host_port}{endpoint}", **self._body_kwargs(json)) as res:
+            content = await res.read()
+            ret = AsyncResponse(res.status, res.headers, content)
+        self._record_latency(endpoint, start_time, time.perf_counter() - start_time, len(content))
+        return ret
+
+    def _body_kwargs(self, json: Dict = None) -> Dict:
+        '''
+        Get the arguments of a post request (of requests or aiohttp) to send `json` in the wire format.
+        '''
+        if self.wire_format != "msgpack":
+            return {"json": json}
+        if not self.is_msgpack_accepted or json is None:
+            return {"json": json, "headers": {"Accept": MSGPACK_TYPE}}
+        return {
+            "data": encode_msgpack(json),
+            "headers": {"Accept": MSGPACK_TYPE, "Content-Type": MSGPACK_TYPE},
+        }
+
+    def _decode(self, res: Union[requests.Response, AsyncResponse]):
+        '''
+        Decode the body of a response, in msgpack or json according to its content type.
+        '''
+        with self.profiler.phase("decode") as phase:
+            phase.size = len(res.content)
+            if res.headers.get("Content-Type", "").startswith(MSGPACK_TYPE):
+                self.is_msgpack_accepted = True
+                return decode_msgpack(res.content)
+            return self.json_loads(res.content)
+
+    def _record_latency(self, endpoint: str, start_time: float, elapsed: float, size: int):
+        self.profiler.record(endpoint, start_time, elapsed, size)
+
+        stats = self.latency_stats.setdefault(endpoint, {"count": 0, "total": 0.0, "max": 0.0})
+        stats["count"] += 1
+        stats["total"] += elapsed
+        stats["max"] = max(stats["max"], elapsed)
+
+    def get_latency_stats(self, clear: bool = False) -> Dict[str, Dict[str, float]]:
+        '''
+        Get the latency statistics of each endpoint.
+
+        Returns:
+            Dict[str, Dict[str, float]]: endpoint -> {count, total, mean, max}, times are in seconds.
+        '''
+        ret = {}
+        for endpoint, stats in self.latency_stats.items():
+            ret[endpoint] = {
+                "count": stats["count"],
+                "total": stats["total"],
+                "mean": stats["total"] / stats["count"],
+                "max": stats["max"],
+            }
+        if clear:
+            self.latency_stats = {}
+        return ret
+
     
     def reset(
         self
     ) -> List[Observation]:
-        res = requests.post(
-            f"{self.mineflayer_host_port}/start",
-            json={
-                "server_host": self.minecraft_server_host,
-                "server_port": self.minecraft_server_port,
-                "minecraft_version": self.minecraft_version,
-                "agents_count": self.agents_count,
-                "agents_config": self.agents_config,
-                "image_width": self.image_width,
-                "image_height": self.image_height,
-                "headless": self.headless,
-            },
-            timeout=self.request_timeout,
-        )
+        res = self._post("/start", json=self._start_body())
+        return self._parse_start_response(res)
+
+    async def areset(
+        self
+    ) -> List[Observation]:
+        res = await self._apost("/start", json=self._start_body())
+        return self._parse_start_response(res)
+
+    def _start_body(self) -> Dict:
+        return {
+            "server_host": self.minecraft_server_host,
+            "server_port": self.minecraft_server_port,
+            "minecraft_version": self.minecraft_version,
+            "agents_count": self.agents_count,
+            "agents_config": self.agents_config,
+            "image_width": self.image_width,
+            "image_height": self.image_height,
+            "headless": self.headless,
+            "voxel_radius": self.voxel_radius,
+            "is_compact_voxels": self.enable_compact_voxels,
+        }
+
+    def _parse_start_response(self, res) -> List[Observation]:
         if res.status_code != 200:
             raise RuntimeError("[Bridge]", "Failed to start, status code: " + str(res.status_code))
+
+        # Mineflayer clears its delta state on start
+        self.observation_state = []
         
-        data = res.json()
+        data = self._decode(res)
 
-        for i in range(len(data['observation'])):
-            data['observation'][i]['event'] = []
+        return [
+            (Observation(**ob, event=[], rgb_decode_mode=self.rgb_decode_mode) if ob else None)
+            for ob in data['observation']
+        ]
 
-        return Observation.from_json_list(data['observation'])
+    def soft_reset(self):
+        '''
+        Reset the state of all bots (running codes, events, code infos and tick) without reconnecting them.
+        '''
+        res = self._post("/soft_reset")
+        if res.status_code != 200:
+            raise RuntimeError("[Bridge]", "Failed to soft reset, status code: " + str(res.status_code))
+
+    def observe(self, ticks: int) -> List[Observation]:
+        '''
+        Wait for `ticks` ticks, then get the observations without executing any action.
+        The events that occurred during the waiting are discarded.
+        '''
+        res = self._post("/step_lst", json=self._step_lst_body(ticks))
+        obs, _, _ = self._parse_step_response(res)
+        for ob in obs:
+            if ob is not None:
+                ob.event = []
+        return obs
 
     def step(
         self,
-        action: List[Union[Action, LowLevelAction]],
+        action: Union[List[Union[Action, LowLevelAction]], LowLevelActionBatch],
     ) -> Tuple[List[Observation], List[CodeInfo], List[Event]]:
         
-        res = requests.post(
-            f"{self.mineflayer_host_port}/step_pre",
-            json={
-                "ticks": self.ticks_per_step,
-                "is_low_level_action": self.enable_low_level_action,
-                "action": [a.to_json() for a in action],
-            },
-            timeout=self.request_timeout,
-        )
+        self.last_runtick_wait = 0.0
+        if self.enable_fused_step:
+            body = self._step_body(action)
+            finished = threading.Event()
+            if body["runtick"]:
+                # Mineflayer sends the runtick command, and waits for its finish which is forwarded from the server
+                threading.Thread(target=self._forward_runtick_finish, args=(body["runtick_id"], finished), daemon=True).start()
+            try:
+                res = self._post("/step", json=body)
+            finally:
+                if body["runtick"] and not finished.is_set():
+                    self._restore_runtick_finished()
+            return self._parse_step_response(res)
 
-        data = res.json()
-        if res.status_code != 200:
-            raise RuntimeError("Failed to step, status code: " + str(res.status_code) + '\n' + "  message: " + data['error'] + '\n')
+        res = self._post("/step_pre", json=self._step_pre_body(action))
+        self._check_step_pre_response(res)
         
         # ===== Divider =====
+        ticks = self.ticks_per_step
         if self.server_manager is not None and self.enable_auto_pause:
-            self.server_manager.execute("runtick " + str(self.ticks_per_step))
+            # Observations are got as soon as the server has actually finished the ticks,
+            # instead of waiting for the wall-clock time of the ticks in mineflayer
+            self.server_manager.runtick(self.ticks_per_step)
+            wait_start_time = time.perf_counter()
+            with self.profiler.phase("runtick"):
+                self.server_manager.wait_for_runtick_finish(timeout=self.RUNTICK_TIMEOUT, consume=False)
+            self.last_runtick_wait = time.perf_counter() - wait_start_time
+            ticks = 0
 
-        res = requests.post(
-            f"{self.mineflayer_host_port}/step_lst",
-            json={
-                "ticks": self.ticks_per_step,
-            },
-            timeout=self.request_timeout,
-        )
+        res = self._post("/step_lst", json=self._step_lst_body(ticks))
+        return self._parse_step_response(res)
+
+    async def astep(
+        self,
+        action: Union[List[Union[Action, LowLevelAction]], LowLevelActionBatch],
+    ) -> Tuple[List[Observation], List[CodeInfo], List[Event]]:
+        
+        self.last_runtick_wait = 0.0
+        if self.enable_fused_step:
+            body = self._step_body(action)
+            finished = threading.Event()
+            forwarder = None
+            if body["runtick"]:
+                forwarder = asyncio.ensure_future(self._aforward_runtick_finish(body["runtick_id"], finished))
+            try:
+                res = await self._apost("/step", json=body)
+            finally:
+                if body["runtick"] and not finished.is_set():
+                    forwarder.cancel()
+                    self._restore_runtick_finished()
+            return self._parse_step_response(res)
+
+        res = await self._apost("/step_pre", json=self._step_pre_body(action))
+        self._check_step_pre_response(res)
         
-        data = res.json()
+        # ===== Divider =====
+        ticks = self.ticks_per_step
+        if self.server_manager is not None and self.enable_auto_pause:
+            self.server_manager.runtick(self.ticks_per_step)
+            wait_start_time = time.perf_counter()
+            with self.profiler.phase("runtick"):
+                await asyncio.to_thread(self.server_manager.wait_for_runtick_finish, self.RUNTICK_TIMEOUT, False)
+            self.last_runtick_wait = time.perf_counter() - wait_start_time
+            ticks = 0
+
+        res = await self._apost("/step_lst", json=self._step_lst_body(ticks))
+        return self._parse_step_response(res)
+
+    def _step_pre_body(self, action: Union[List[Union[Action, LowLevelAction]], LowLevelActionBatch]) -> Dict:
+        if isinstance(action, LowLevelActionBatch):
+            # A single nested list of all agents
+            action_json = action.to_json()
+        else:
+            action_json = [a.to_json() for a in action]
+        return {
+            "ticks": self.ticks_per_step,
+            "is_low_level_action": self.enable_low_level_action,
+            "action": action_json,
+        }
+
+    def _step_lst_body(self, ticks: int) -> Dict:
+        return {
+            "ticks": ticks,
+            "is_binary_rgb": self.enable_binary_rgb,
+            "is_delta_observation": self.enable_delta_observation,
+        }
+
+    def _step_body(self, action: Union[List[Union[Action, LowLevelAction]], LowLevelActionBatch]) -> Dict:
+        '''
+        The body of /step, which sends actions and receives observations in a single round-trip.
+        In AUTO PAUSE mode, mineflayer triggers the runtick command after the actions are executed.
+        The finished flag is cleared here, before the command can be sent.
+        '''
+        runtick = self.server_manager is not None and self.enable_auto_pause
+        if runtick:
+            self.runtick_id += 1
+            self.server_manager.runtick_finished_event.clear()
+        return {
+            **self._step_pre_body(action),
+            "runtick": runtick,
+            "runtick_id": self.runtick_id,
+            "is_binary_rgb": self.enable_binary_rgb,
+            "is_delta_observation": self.enable_delta_observation,
+        }
+
+    def _forward_runtick_finish(self, runtick_id: int, finished: threading.Event):
+        '''
+        Wait for the runtick command sent by the fused /step to finish on the server, and tell mineflayer,
+        which can't see the outputs of the server. The observations are got anyway after RUNTICK_TIMEOUT.
+        A runtick_id is sent, so that a late forward of a previous step doesn't finish the current one.
+        `finished` is set before mineflayer is told, so /step can't respond before it's set if the command is sent.
+        '''
+        wait_start_time = time.perf_counter()
+        with self.profiler.phase("runtick"):
+            self.server_manager.wait_for_runtick_finish(timeout=self.RUNTICK_TIMEOUT, consume=False)
+        if runtick_id == self.runtick_id:
+            self.last_runtick_wait = time.perf_counter() - wait_start_time
+        finished.set()
+        self._post("/runtick_finished", json={"runtick_id": runtick_id})
+
+    async def _aforward_runtick_finish(self, runtick_id: int, finished: threading.Event):
+        wait_start_time = time.perf_counter()
+        with self.profiler.phase("runtick"):
+            await asyncio.to_thread(self.server_manager.wait_for_runtick_finish, self.RUNTICK_TIMEOUT, False)
+        if runtick_id == self.runtick_id:
+            self.last_runtick_wait = time.perf_counter() - wait_start_time
+        finished.set()
+        await self._apost("/runtick_finished", json={"runtick_id": runtick_id})
+
+    def _restore_runtick_finished(self):
+        # /step has responded without the finish of its runtick, because mineflayer didn't send the command
+        # (the actions are invalid, or no bot is active). Set the flag back, so that later waits don't block.
+        self.server_manager.runtick_finished_event.set()
+
+    def _check_step_pre_response(self, res):
+        data = self._decode(res)
         if res.status_code != 200:
             raise RuntimeError("Failed to step, status code: " + str(res.status_code) + '\n' + "  message: " + data['error'] + '\n')
-        for i in range(len(data['observation'])):
-            if data['observation'][i] is not None:
-                data['observation'][i]['event'] = data['event'][i]
+
+    def _parse_step_response(
+        self,
+        res: Union[requests.Response, AsyncResponse],
+    ) -> Tuple[List[Observation], List[CodeInfo], List[Event]]:
+        if res.status_code != 200:
+            raise RuntimeError("Failed to step, status code: " + str(res.status_code) + '\n' + "  message: " + self._decode(res)['error'] + '\n')
+
+        if res.headers.get("Content-Type", "").startswith("application/octet-stream"):
+            data, frames = self._split_binary_response(res)
+        else:
+            data = self._decode(res)
+            frames = None
+            if 'frames' in data:
+                # msgpack carries the frames as a raw bin
+                frames = np.frombuffer(data['frames'], dtype=np.uint8).reshape(data['frame_shape'])
+
+        if self.profiler.enabled:
+            # The sizes as received, before the delta fields are patched
+            sizes = [self._observation_size(ob) if ob else None for ob in data['observation']]
+            if frames is not None:
+                sizes = [size + frames[i].nbytes if size is not None else None for i, size in enumerate(sizes)]
+
+        if data.get('is_delta_observation', False):
+            self._patch_observation_delta(data['observation'])
+
+        # Build observations in one pass, with their events and frames
+        events = data['event']
+        obs = []
+        for i, ob in enumerate(data['observation']):
+            if not ob:
+                obs.append(None)
+                continue
+            if frames is not None:
+                # (height, width, 3) -> (3, height, width), a view without copying
+                ob['rgb'] = frames[i].transpose(2, 0, 1)
+            with self.profiler.phase("observation", agent=i) as phase:
+                if self.profiler.enabled:
+                    phase.size = sizes[i]
+                obs.append(Observation(**ob, event=events[i], rgb_decode_mode=self.rgb_decode_mode))
         
         return (
-            Observation.from_json_list(data['observation']),
+            obs,
             CodeInfo.from_json_list(data['code_info']),
-            data['event'], # No event class wrapper
+            events, # No event class wrapper
         )
     
+    @staticmethod
+    def _observation_size(ob: Dict) -> int:
+        '''
+        The size in bytes of an agent's observation as compact json, where bins count their own lengths.
+        It's only computed when profiling, because it serializes the observation again.
+        '''
+        bin_size = 0
+        def default(value):
+            nonlocal bin_size
+            bin_size += len(value) if isinstance(value, (bytes, bytearray)) else getattr(value, "nbytes", 0)
+            return None
+        return len(json.dumps(ob, separators=(',', ':'), default=default)) + bin_size
+
+    def _patch_observation_delta(self, observations: List[Dict]):
+        '''
+        Fill the fields omitted by mineflayer with the last received values, in place.
+        The unchanged values are shared between the observations of consecutive steps.
+        '''
+        while len(self.observation_state) < len(observations):
+            self.observation_state.append(None)
+
+        for i, ob in enumerate(observations):
+            if ob is None:
+                # Mineflayer sends all fields when the agent is back
+                self.observation_state[i] = None
+                continue
+            if self.observation_state[i] is None:
+                self.observation_state[i] = {}
+            state = self.observation_state[i]
+            for field in self.DELTA_FIELDS:
+                if field in ob:
+                    state[field] = ob[field]
+                elif field in state:
+                    ob[field] = state[field]
+                else:
+                    raise RuntimeError("[Bridge]", f"Field {field} of agent {i} is missing in the delta observation.")
+
+    def _split_binary_response(self, res: Union[requests.Response, AsyncResponse]) -> Tuple[Dict, np.ndarray]:
+        '''
+        Split a binary step response into the json data and the RGB frames.
+
+        The layout of the body is:
+            [4 bytes: length of json (uint32, big-endian)][json][frames (uint8)]
+
+        Returns:
+            Tuple[Dict, np.ndarray]: The json data, and the frames of shape (agents, height, width, 3).
+        '''
+        body = res.content
+        json_length = int.from_bytes(body[:4], byteorder="big")
+        with self.profiler.phase("decode") as phase:
+            phase.size = json_length
+            data = self.json_loads(body[4 : 4 + json_length])
+        shape = tuple(int(x) for x in res.headers["X-Frame-Shape"].split(","))
+        frames = np.frombuffer(body, dtype=np.uint8, offset=4 + json_length).reshape(shape)
+        return data, frames
+
     def add_an_agent(self, agent_config: Dict[str, Union[int, str]]):
-        res = requests.post(
-            f"{self.mineflayer_host_port}/add_an_agent",
+        res = self._post(
+            "/add_an_agent",
             json={
                 "server_host": self.minecraft_server_host,
                 "server_port": self.minecraft_server_port,
@@ -142,103 +555,149 @@ class Bridge:
                 "image_height": self.image_height,
                 "headless": self.headless,
             },
-            timeout=self.request_timeout,
         )
         if res.status_code != 200:
             raise RuntimeError("[Bridge]", "Failed to add an agent, status code: " + str(res.status_code))
     
+    def get_block_table(self) -> BlockTable:
+        '''
+        Get the table between block ids and block names, which is cached after the first request.
+        '''
+        if self.block_table is None:
+            res = self._post("/block_table")
+            if res.status_code != 200:
+                raise RuntimeError("[Bridge]", "Failed to get block table, status code: " + str(res.status_code))
+            self.block_table = BlockTable(res.json()["names"])
+        return self.block_table
+
     def disconnect_an_agent(self, name: str):
-        res = requests.post(
-            f"{self.mineflayer_host_port}/disconnect_an_agent",
+        res = self._post(
+            "/disconnect_an_agent",
             json={
                 "name": name,
             },
-            timeout=self.request_timeout,
         )
         if res.status_code != 200:
             raise RuntimeError("[Bridge]", "Failed to disconnect an agent, status code: " + str(res.status_code))
 
 
-    def close(self):
-        res = requests.post(
-            f"{self.mineflayer_host_port}/end",
-            timeout=self.request_timeout,
-        )
+    def close(self, shutdown_mineflayer: bool = True):
+        res = self._post("/end")
         if res.status_code != 200:
             raise RuntimeError("[Bridge]", "Failed to close, status code: " + str(res.status_code))
         
-        self.mineflayer_manager.shutdown()
+        self.session.close()
+        if shutdown_mineflayer:
+            self.mineflayer_manager.shutdown()
+        return res.json()
+
+    async def aclose(self, shutdown_mineflayer: bool = True):
+        res = await self._apost("/end")
+        if res.status_code != 200:
+            raise RuntimeError("[Bridge]", "Failed to close, status code: " + str(res.status_code))
+
+        if self.async_session is not None:
+            await self.async_session.close()
+            self.async_session = None
+        self.session.close()
+        if shutdown_mineflayer:
+            await asyncio.to_thread(self.mineflayer_manager.shutdown)
         return res.json()
     
     # ===== Camera =====
     
     def addCamera(self, camera_id):
         self.camera_set.add(camera_id)
-        res = requests.post(
-            f"{self.mineflayer_host_port}/addCamera",
+        res = self._post(
+            "/addCamera",
             json={
                 "camera_id": camera_id,
                 "image_width": self.image_width,
                 "image_height": self.image_height,
             },
-            timeout=self.request_timeout,
         )
         if res.status_code != 200:
             raise RuntimeError("[Bridge]", "Failed to add camera, status code: " + str(res.status_code))
         
-        return res.json()
+        return self._decode(res)
     
     def getCameraView(self, camera_id):
         if camera_id not in self.camera_set:
             raise ValueError(f"Camera ID {camera_id} is not available in the camera set.")
         
-        res = requests.post(
-            f"{self.mineflayer_host_port}/getCameraView",
+        res = self._post(
+            "/getCameraView",
             json={
                 "camera_id": camera_id,
             },
-            timeout=self.request_timeout,
         )
         if res.status_code != 200:
             raise RuntimeError("[Bridge]", "Failed to get camera view, status code: " + str(res.status_code))
         
-        data = res.json()
+        data = self._decode(res)
 
+        if isinstance(data['rgb'], bytes):
+            # msgpack carries the image as a raw bin, convert it back to base64 for compatibility
+            return base64.b64encode(data['rgb']).decode('ascii')
         return data['rgb']
+
+    def getCameraImage(self, camera_id) -> np.ndarray:
+        '''
+        Get the view of a camera as an RGB array of shape (3, height, width), like base64_to_image(getCameraView(camera_id)).
+        Return None if the camera hasn't rendered yet.
+        With wire_format="msgpack", the image bytes are decoded directly, without converting to base64.
+        '''
+        if camera_id not in self.camera_set:
+            raise ValueError(f"Camera ID {camera_id} is not available in the camera set.")
+
+        res = self._post(
+            "/getCameraView",
+            json={
+                "camera_id": camera_id,
+            },
+        )
+        if res.status_code != 200:
+            raise RuntimeError("[Bridge]", "Failed to get camera view, status code: " + str(res.status_code))
+
+        rgb = self._decode(res)['rgb']
+        if not rgb:
+            # The camera hasn't rendered yet
+            return None
+        if isinstance(rgb, str):
+            rgb = base64.b64decode(rgb)
+        return bytes_to_image(rgb)
     
     def updateCameraLocation(self, camera_id, pos, yaw, pitch):
         if camera_id not in self.camera_set:
             raise ValueError(f"Camera ID {camera_id} is not available in the camera set.")
         
-        res = requests.post(
-            f"{self.mineflayer_host_port}/updateCameraLocation",
+        res = self._post(
+            "/updateCameraLocation",
             json={
                 "camera_id": camera_id,
                 "pos": pos,
                 "yaw": yaw,
                 "pitch": pitch,
             },
-            timeout=self.request_timeout,
         )
         if res.status_code != 200:
             raise RuntimeError("[Bridge]", "Failed to update camera location, status code: " + str(res.status_code))
-        return res.json()
+        return self._decode(res)
     
     def moveCamera(self, camera_id, pos, yaw, pitch):
         if camera_id not in self.camera_set:
             raise ValueError(f"Camera ID {camera_id} is not available in the camera set.")
         
-        res = requests.post(
-            f"{self.mineflayer_host_port}/moveCameraLocation",
+        res = self._post(
+            "/moveCameraLocation",
             json={
                 "camera_id": camera_id,
                 "d_pos": pos,
                 "d_yaw": yaw,
                 "d_pitch": pitch,
             },
-            timeout=self.request_timeout,
         )
         if res.status_code != 200:
             raise RuntimeError("[Bridge]", "Failed to add camera location, status code: " + str(res.status_code))
-        return res.json()
+        return self._decode(res)
     
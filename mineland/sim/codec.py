@@ -0,0 +1,60 @@
+'''
+Encoders and decoders of the messages between Bridge and mineflayer.
+'''
+
+import json
+from typing import Any, Callable
+
+has_orjson = False
+try:
+    import orjson
+    has_orjson = True
+except ImportError:
+    pass
+
+has_msgpack = False
+try:
+    import msgpack
+    has_msgpack = True
+except ImportError:
+    pass
+
+MSGPACK_TYPE = "application/msgpack"
+WIRE_FORMATS = ["json", "msgpack"]
+
+JSON_DECODERS = ["auto", "orjson", "json"]
+
+def get_json_decoder(name: str = "auto") -> Callable[[bytes], Any]:
+    '''
+    Get a function which decodes a json body (bytes) into python objects.
+
+    Args:
+        name (str): "orjson", "json" (the standard library),
+                    or "auto" to use orjson if it's installed.
+    '''
+    if name not in JSON_DECODERS:
+        raise ValueError(f"Invalid json_decoder: {name}, must be one of {', '.join(JSON_DECODERS)}.")
+
+    if name == "auto":
+        name = "orjson" if has_orjson else "json"
+
+    if name == "orjson":
+        if not has_orjson:
+            raise ValueError("json_decoder is orjson, but orjson is not installed. You can install it by `pip install orjson`.")
+        return orjson.loads
+    return json.loads
+
+def check_wire_format(wire_format: str):
+    if wire_format not in WIRE_FORMATS:
+        raise ValueError(f"Invalid wire_format: {wire_format}, must be one of {', '.join(WIRE_FORMATS)}.")
+    if wire_format == "msgpack" and not has_msgpack:
+        raise ValueError("wire_format is msgpack, but msgpack is not installed. You can install it by `pip install msgpack`.")
+
+def encode_msgpack(data) -> bytes:
+    return msgpack.packb(data, use_bin_type=True)
+
+def decode_msgpack(content: bytes):
+    '''
+    Decode a msgpack body. Strings are decoded into str, and raw bins into bytes.
+    '''
+    return msgpack.unpackb(content, raw=False)
@@ -1,6 +1,8 @@
 from .action import Action
 from .low_level_action import LowLevelAction
+from .low_level_action import LowLevelActionBatch
 from .observation import Observation
+from .block_table import BlockTable
 from .code_info import CodeInfo
 from .event import Event
 from .task_info import TaskInfo
\ No newline at end of file
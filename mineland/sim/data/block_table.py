@@ -0,0 +1,40 @@
+from typing import List
+
+import numpy as np
+
+class BlockTable:
+    '''The table between block ids and block names of the minecraft version, used by compact voxels.
+
+    Example:
+        >>> table = mland.get_block_table()
+        >>> table.name(obs[0].voxels['block_id'][1, 0, 1])
+        'grass_block'
+        >>> obs[0].voxels['block_id'] == table.id('water')
+    '''
+
+    # The block id of unloaded blocks in compact voxels
+    UNLOADED = 65535
+
+    def __init__(self, names: List[str]):
+        '''
+        Args:
+            names (List[str]): The block names indexed by block ids.
+        '''
+        self.names = names
+        self.ids = {name: i for i, name in enumerate(names) if name is not None}
+        self.names_array = np.array(names + [None], dtype=object)
+
+    def name(self, block_id: int) -> str:
+        if block_id == self.UNLOADED:
+            return None
+        return self.names[block_id]
+
+    def id(self, name: str) -> int:
+        return self.ids[name]
+
+    def names_of(self, block_ids: np.ndarray) -> np.ndarray:
+        '''
+        Convert an array of block ids into an array of block names. Unloaded blocks are None.
+        '''
+        block_ids = np.where(block_ids == self.UNLOADED, len(self.names), block_ids)
+        return self.names_array[block_ids]
@@ -11,6 +11,8 @@ class CodeInfo:
         Cannot read property 'property' of undefined
 
     '''
+
+    __slots__ = ("name", "is_running", "is_ready", "code_error", "last_code", "code_tick")
     
     def __init__(
             self,
@@ -36,14 +38,17 @@ class CodeInfo:
             None
         '''
 
-        local_vars = locals()
-        for name, value in local_vars.items():
-            if name != "self":
-                setattr(self, name, value)
+        self.name = name
+        self.is_running = is_running
+        self.is_ready = is_ready
+        self.code_error = code_error
+        self.last_code = last_code
+        self.code_tick = code_tick
     
     def __str__(self) -> str:
         result = "CodeInfo (\n"
-        for name, value in self.__dict__.items():
+        for name in self.__slots__:
+            value = getattr(self, name)
             if name == "code_error":
                 if value == {}: 
                     result += f"    {name}: None\n"
@@ -10,6 +10,9 @@ class Event:
     '''
     This class is used to represent events that occured in mineflayer bot.
     '''
+
+    __slots__ = ("type", "message", "tick")
+
     def __init__(
         self,
         type: str,
@@ -22,14 +25,14 @@ class Event:
             type (str): The type of the event.
             message (str): The detailed message of the event.
         '''
-        local_vars = locals()
-        for name, value in local_vars.items():
-            if name != "self":
-                setattr(self, name, value)
+        self.type = type
+        self.message = message
+        self.tick = tick
     
     def __str__(self) -> str:
         result = "Event ("
-        for name, value in self.__dict__.items():
+        for name in self.__slots__:
+            value = getattr(self, name)
             result += f" ({name}:{value}) "
         result += ")"
         return result
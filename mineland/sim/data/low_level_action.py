@@ -1,5 +1,9 @@
 
 import random
+from typing import List
+
+import numpy as np
+from gymnasium.spaces import MultiDiscrete
 
 class LowLevelAction:
     def __init__(self):
@@ -33,4 +37,97 @@ class LowLevelAction:
                 if action.max[i] == -1:
                     continue
                 action[i] = random.randint(action.min[i], action.max[i])
-        return actions
\ No newline at end of file
+        return actions
+
+class LowLevelActionBatch:
+    '''
+    Low-level actions of all agents in a step, stored in a numpy int array of shape (agents, 8).
+
+    It is sent to mineflayer as a single nested list, instead of one json string per agent.
+    Values are checked when they are set by `act[...] = ...`, and again when the batch is serialized,
+    since `data` can be modified directly.
+
+    Example:
+        >>> act = LowLevelActionBatch.no_op(2)
+        >>> act[0, 0] = 1            # agent 0 moves forward
+        >>> act[:, 5] = 3            # all agents attack
+        >>> act.data                 # np.ndarray of shape (2, 8)
+    '''
+
+    MIN = np.zeros(8, dtype=np.int32)
+    MAX = np.array([2, 2, 3, 24, 24, 9, 243, 45], dtype=np.int32)
+
+    def __init__(self, data):
+        '''
+        Args:
+            data: An int array-like of shape (agents, 8).
+        '''
+        self.data = np.array(data, dtype=np.int32)
+        if self.data.ndim != 2 or self.data.shape[1] != 8:
+            raise ValueError(f"The shape of low-level actions must be (agents, 8), but got {self.data.shape}")
+        self.validate()
+
+    def __getitem__(self, key):
+        value = self.data[key]
+        if isinstance(value, np.ndarray):
+            # A read-only view, so that values can only be set by __setitem__, which validates them
+            value = value.view()
+            value.flags.writeable = False
+        return value
+
+    def __setitem__(self, key, value):
+        old_value = np.copy(self.data[key])
+        self.data[key] = value
+        try:
+            self.validate()
+        except ValueError:
+            self.data[key] = old_value
+            raise
+
+    def __len__(self):
+        return self.data.shape[0]
+
+    def __str__(self):
+        return f'LowLevelActionBatch({self.data.tolist()})'
+
+    def validate(self):
+        '''
+        Check that all values are in [MIN, MAX].
+        '''
+        invalid = (self.data < self.MIN) | (self.data > self.MAX)
+        if invalid.any():
+            agent, key = np.argwhere(invalid)[0]
+            raise ValueError(
+                f"Value {self.data[agent, key]} of agent {agent} is out of range for key {key}, "
+                f"min: {self.MIN[key]}, max: {self.MAX[key]}"
+            )
+
+    def to_json(self):
+        self.validate()
+        return self.data.tolist()
+
+    @staticmethod
+    def space(num_of_agents: int):
+        '''
+        Get the gym space of the low-level actions of `num_of_agents` agents.
+        '''
+        nvec = np.tile(LowLevelActionBatch.MAX - LowLevelActionBatch.MIN + 1, (num_of_agents, 1))
+        return MultiDiscrete(nvec, dtype=np.int32)
+
+    @staticmethod
+    def from_actions(actions: List[LowLevelAction]):
+        return LowLevelActionBatch([action.data for action in actions])
+
+    @staticmethod
+    def no_op(num_of_agents: int):
+        return LowLevelActionBatch(np.zeros((num_of_agents, 8), dtype=np.int32))
+
+    @staticmethod
+    def random_op(num_of_agents: int):
+        data = np.random.randint(
+            LowLevelActionBatch.MIN,
+            LowLevelActionBatch.MAX + 1,
+            size=(num_of_agents, 8),
+            dtype=np.int32,
+        )
+        return LowLevelActionBatch(data)
@@ -1,11 +1,53 @@
-from typing import List, Dict
+from typing import List, Dict, Union
+import numpy as np
+import base64
 from ...utils import base64_to_image
-from pydub import AudioSegment
+
+# Bits of the flags of compact voxels, refer to ObservationUtils.getCompactVoxels
+VOXEL_FLAGS = {
+    "is_collidable": 1,
+    "is_tool_not_required": 2,
+    "is_liquid": 4,
+    "is_solid": 8,
+    "blocks_light": 16,
+}
+
+def decode_compact_voxels(voxels: Dict) -> Dict:
+    '''
+    Decode compact voxels into numpy arrays of shape (2 * radius + 1,) * 3, indexed by the offsets [x][y][z].
+
+    Returns:
+        Dict: {"radius": int, "block_id": uint16 np.ndarray, "flags": uint8 np.ndarray}
+    '''
+    side = 2 * voxels["radius"] + 1
+    return {
+        "radius": voxels["radius"],
+        "block_id": np.frombuffer(base64.b64decode(voxels["block_id"]), dtype="<u2").reshape(side, side, side),
+        "flags": np.frombuffer(base64.b64decode(voxels["flags"]), dtype=np.uint8).reshape(side, side, side),
+    }
 
 class Observation:
     """Observation of the environment.
     """    
 
+    # Attributes are stored in slots instead of a per-instance __dict__, the order is used by __str__
+    __slots__ = (
+        "name",
+        "rgb_height", "rgb_width", "rgb_base64", "_rgb", "rgb_decode_mode",
+        "equipment", "equip",
+        "inventory_full_slot_count", "inventory_empty_slot_count", "inventory_slot_count", "inventory_all", "inventory",
+        "voxels",
+        "face_vector",
+        "life_stats",
+        "location_stats",
+        "tick", "time", "day", "age",
+        "difficulty",
+        "control_state",
+        "event",
+        "target_entities",
+        "sound",
+    )
+
     def __init__(
         self,
 
@@ -15,8 +57,9 @@ class Observation:
         # ===== RGB Frame =====
         rgb_height: int,
         rgb_width: int,
-        rgb: str, # Constructor convert rgb from base64 to np.ndarray
-                  # Be careful! The origin rgb may be an empty string, like "".
+        rgb: Union[str, np.ndarray], # Constructor convert rgb from base64 to np.ndarray
+                                     # Be careful! The origin rgb may be an empty string, like "".
+                                     # If rgb is already a np.ndarray (binary RGB transport), it is used directly.
         
         # ===== Equipment =====
         equipment: Dict, # MineDojo-Style
@@ -30,7 +73,7 @@ class Observation:
         inventory: Dict,
 
         # ===== Voxels =====
-        voxels:Dict,
+        voxels:Dict,     # MineDojo-Style, or compact voxels which are decoded into np.ndarray (block_id and flags)
         # ===== Face Vector =====
         face_vector:List,
         # ===== Life Statistics =====
@@ -58,7 +101,10 @@ class Observation:
         target_entities: List,
 
         # ===== Sound =====
-        sound: AudioSegment
+        sound: np.ndarray,
+
+        # ===== RGB Decode Mode =====
+        rgb_decode_mode: str = "eager",
     ):
         """Construct an observation.
 
@@ -70,36 +116,84 @@ class Observation:
                         The range of time is [0, 24000).
 
             day (int): The day of the world.
+
+            sound (np.ndarray): The sound heard during the last step, int16 PCM, refer to SoundSystem.
+                                None if the sound system is disabled.
+
+            rgb_decode_mode (str): When to decode rgb from base64 to np.ndarray.
+                                   "eager": decode in the constructor.
+                                   "lazy": decode on the first access of rgb, then cache it.
+                                   "never": never decode, rgb is always None.
         """        
 
-        local_vars = locals()
-        for name, value in local_vars.items():
-            
-            # === RGB Frame ===
-            if name == 'rgb':
-                setattr(self, "rgb_base64", value)
-                rgb = base64_to_image(value, rgb_width, rgb_height)
-                setattr(self, name, rgb)
-            
-            # === Self ===
-            elif name == "self":
-                continue
-                
-            # === Others ===
-            else:
-                setattr(self, name, value)
-            
-    
+        # ===== Basic Attributes =====
+        self.name = name
+
+        # ===== RGB Frame =====
+        self.rgb_height = rgb_height
+        self.rgb_width = rgb_width
+        self.rgb_decode_mode = rgb_decode_mode
+        if isinstance(rgb, np.ndarray):
+            self.rgb_base64 = ""
+            self._rgb = rgb
+        else:
+            self.rgb_base64 = rgb
+            self._rgb = None
+            if rgb_decode_mode == "eager":
+                self._rgb = base64_to_image(rgb, rgb_width, rgb_height)
+
+        # ===== Equipment =====
+        self.equipment = equipment
+        self.equip = equip
+
+        # ===== Inventory =====
+        self.inventory_full_slot_count = inventory_full_slot_count
+        self.inventory_empty_slot_count = inventory_empty_slot_count
+        self.inventory_slot_count = inventory_slot_count
+        self.inventory_all = inventory_all
+        self.inventory = inventory
+
+        # ===== Voxels =====
+        if isinstance(voxels, dict) and isinstance(voxels.get("block_id"), str):
+            voxels = decode_compact_voxels(voxels)
+        self.voxels = voxels
+
+        # ===== Others =====
+        self.face_vector = face_vector
+        self.life_stats = life_stats
+        self.location_stats = location_stats
+        self.tick = tick
+        self.time = time
+        self.day = day
+        self.age = age
+        self.difficulty = difficulty
+        self.control_state = control_state
+        self.event = event
+        self.target_entities = target_entities
+        self.sound = sound
+
+    @property
+    def rgb(self):
+        if self._rgb is None and self.rgb_decode_mode == "lazy":
+            self._rgb = base64_to_image(self.rgb_base64, self.rgb_width, self.rgb_height)
+        return self._rgb
+
+    @rgb.setter
+    def rgb(self, value):
+        self._rgb = value
+
     def __str__(self) -> str:
         result = "Observation (\n"
 
-        for name, value in self.__dict__.items():
+        for name in self.__slots__:
+            value = getattr(self, name)
             # === RGB Frame ===
-            if name == "rgb":
-                result += f"    {name}: {value.shape}\n"
+            if name == "_rgb":
+                rgb = self.rgb
+                result += f"    rgb: {rgb.shape if rgb is not None else None}\n"
             
-            # === Base64 ===
-            elif name == "rgb_base64":
+            # === Base64 and Decode Mode ===
+            elif name == "rgb_base64" or name == "rgb_decode_mode":
                 continue
             
             # === Dict ===
@@ -121,12 +215,12 @@ class Observation:
         return getattr(self, key, None)
     
     @classmethod
-    def from_json(cls, json):
+    def from_json(cls, json, rgb_decode_mode="eager"):
         if json == {}:
             return None
-        return cls(**json)
+        return cls(**json, rgb_decode_mode=rgb_decode_mode)
     
     @classmethod
-    def from_json_list(cls, json_list):
-        return [(cls.from_json(json) if json is not None else None) for json in json_list]
+    def from_json_list(cls, json_list, rgb_decode_mode="eager"):
+        return [(cls.from_json(json, rgb_decode_mode) if json is not None else None) for json in json_list]
     
\ No newline at end of file
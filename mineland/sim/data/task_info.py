@@ -3,6 +3,8 @@ from typing import Any, Dict, List
 class TaskInfo:
     '''The information of the task.
     '''
+
+    __slots__ = ("task_id", "is_success", "is_failed", "goal", "guidance", "score", "local_score", "global_score", "mode", "target")
     
     def __init__(
             self,
@@ -18,14 +20,21 @@ class TaskInfo:
             mode: str = 'cooperative',
             target: List[Dict[str, Any]] = None,
     ):
-        local_vars = locals()
-        for name, value in local_vars.items():
-            if name != "self":
-                setattr(self, name, value)
+        self.task_id = task_id
+        self.is_success = is_success
+        self.is_failed = is_failed
+        self.goal = goal
+        self.guidance = guidance
+        self.score = score
+        self.local_score = local_score
+        self.global_score = global_score
+        self.mode = mode
+        self.target = target
     
     def __str__(self) -> str:
         result = "TaskInfo (\n"
-        for name, value in self.__dict__.items():
+        for name in self.__slots__:
+            value = getattr(self, name)
             result += f"    {name}: {value}\n"
         result += ")"
         return result
@@ -46,7 +46,14 @@ constructor() {
     this.hearing_distance = 50.0
     this.high_level_action_code = ""
 
+    // Voxels around bots, refer to ObservationUtils.getVoxels
+    this.voxel_options = { radius: 1, is_compact: false }
+
     this.tick = 0
+    this.tick_waiters = [] // [{ tick, resolve }], resolved when this.tick reaches tick
+
+    this.runtick_finished_id = 0
+    this.runtick_waiters = [] // [{ id, resolve }], resolved when the runtick of id is finished on the server
 }
 
 createBot = (username, host, port, version) => {
@@ -84,6 +91,7 @@ createBot = (username, host, port, version) => {
     if (this.bots.length === 1) {
         bot.on('physicsTick', () => {
             this.tick += 1
+            this.resolveTickWaiters(false)
         })
     }
 
@@ -130,6 +138,7 @@ addEventListener = (bot, is_first_bot=false) => {
                     type: 'entityHurt',
                     entity_type: 'self',
                     entity_name: bot.username,
+                    position: entity.position.clone(), // copied, the entity may move or be removed before the event is sent
                     message: 'bot#' + bot.username + ' get hurt',
                     tick: self.tick,
                 })
@@ -138,6 +147,7 @@ addEventListener = (bot, is_first_bot=false) => {
                     type: 'entityHurt',
                     entity_type: 'bot',
                     entity_name: bot.username,
+                    position: entity.position.clone(),
                     message: 'bot#' + bot.username + ' get hurt',
                     tick: self.tick,
                 })
@@ -146,6 +156,7 @@ addEventListener = (bot, is_first_bot=false) => {
                     type: 'entityHurt',
                     entity_type: entity.type,
                     entity_name: entity.username,
+                    position: entity.position.clone(),
                     message: entity.username + ' is hurt',
                     tick: self.tick,
                 })
@@ -154,6 +165,7 @@ addEventListener = (bot, is_first_bot=false) => {
                     type: 'entityHurt',
                     entity_type: entity.type,
                     entity_name: entity.name,
+                    position: entity.position.clone(),
                     message: entity.displayName + ' is hurt',
                     tick: self.tick,
                 })
@@ -168,6 +180,7 @@ addEventListener = (bot, is_first_bot=false) => {
                 type: 'entityDead',
                 entity_type: entity.type,
                 entity_name: entity.name,
+                position: entity.position.clone(),
                 message: entity.displayName + ' dead',
                 tick: self.tick,
             })
@@ -181,6 +194,7 @@ addEventListener = (bot, is_first_bot=false) => {
                 type: 'entityEat',
                 entity_type: entity.type,
                 entity_name: entity.name,
+                position: entity.position.clone(),
                 message: entity.displayName + ' is eating',
                 tick: self.tick,
             })
@@ -197,7 +211,7 @@ addEventListener = (bot, is_first_bot=false) => {
                 type: 'entitySpawn',
                 entity_type: entity.type,
                 entity_name: entity.name,
-                position: entity.position,
+                position: entity.position.clone(),
                 message: entity.displayName + ' has spawned',
                 tick: self.tick,
             })
@@ -249,6 +263,7 @@ addEventListener = (bot, is_first_bot=false) => {
         this.events[this.bots.indexOf(bot)].push({
             type: 'blockIsBeingBroken',
             block_name: block.name,
+            position: block.position.offset(0.5, 0.5, 0.5),
             message: 'A ' + block.name + ' block is being broken',
             tick: self.tick,
         })
@@ -310,6 +325,8 @@ stopTpInterval = () => {
 }
 
 stopAll = () => {
+    this.resolveTickWaiters(true)
+    this.finishRuntick(Infinity)
     this.bots.forEach(bot => {
         if (bot.mineland_is_active) {
             bot.end();
@@ -485,6 +502,55 @@ runLowLevelActionByOrder = async (id, action) => {
 
 }
 
+/**
+ * Reset the state of all bots without disconnecting them.
+ * Running codes are interrupted, and the events, code infos and tick are cleared.
+ */
+resetAllBotsState = () => {
+    for(let i = 0; i < this.bots.length; ++i) {
+        if (!this.bots[i].mineland_is_active) continue
+
+        this.interruptBotByOrder(i)
+        this.code_error[i] = ''
+        this.current_code[i] = ''
+        this.code_tick[i] = 0
+    }
+    this.clearEvents()
+    this.resolveTickWaiters(true)
+    this.finishRuntick(Infinity)
+    this.tick = 0
+}
+
+/**
+ * Wait until the bots have run `ticks` physics ticks.
+ * The ticks are counted by the first bot, if it's not active, wall-clock time (50ms per tick) is used instead.
+ */
+waitForTicks = (ticks) => {
+    return new Promise(resolve => {
+        if (ticks <= 0) return resolve()
+        if (this.bots.length === 0 || !this.bots[0].mineland_is_active) {
+            return setTimeout(resolve, ticks * 50)
+        }
+        this.tick_waiters.push({ tick: this.tick + ticks, resolve: resolve })
+    })
+}
+
+/**
+ * Resolve the waiters whose tick is reached, or all waiters if `all` is true.
+ */
+resolveTickWaiters = (all) => {
+    if (this.tick_waiters.length === 0) return
+    const remaining = []
+    for (const waiter of this.tick_waiters) {
+        if (all || this.tick >= waiter.tick) {
+            waiter.resolve()
+        } else {
+            remaining.push(waiter)
+        }
+    }
+    this.tick_waiters = remaining
+}
+
 clearCodeErorrs = () => {
     for(let i = 0; i < this.bots.length; ++i) {
         if (!this.bots[i].mineland_is_active) continue
@@ -526,7 +592,36 @@ getBotIsActive = (id) => {
 getBotObservation = (id) => {
     if (!this.bots[id].mineland_is_active) return null
 
-    return ObservationUtils.getObservation(this.bots[id], this.viewer_manager, this.tick);
+    return ObservationUtils.getObservation(this.bots[id], this.viewer_manager, this.tick, this.voxel_options);
+}
+
+/**
+ * Get the block names indexed by block id (block.type) of the connected version.
+ */
+getBlockNames = () => {
+    const bot = this.bots.find(bot => bot.mineland_is_active && bot.registry)
+    if (bot === undefined) return null
+    const names = []
+    for (const block of bot.registry.blocksArray) {
+        names[block.id] = block.name
+    }
+    return names
+}
+
+/**
+ * Get the RGB frames of all bots in one contiguous buffer (bots * height * width * 3).
+ * The frame of an inactive bot or a bot without image is filled with zeros.
+ */
+getBotsRawViews = (count) => {
+    const frame_size = this.viewer_manager.image_width * this.viewer_manager.image_height * 3
+    const frames = Buffer.alloc(frame_size * count)
+    for(let i = 0; i < count; ++i) {
+        if (!this.bots[i].mineland_is_active) continue
+
+        const rgb = this.viewer_manager.getBotRawViewByName(this.bots[i].username)
+        if (rgb !== null) rgb.copy(frames, i * frame_size)
+    }
+    return frames
 }
 
 /**
@@ -599,6 +694,47 @@ clearEvents = () => {
         this.events[i] = []
     }
 }
+/**
+ * Run ticks on a paused server by the first active bot.
+ * All bots have op permission, so they can execute the runtick command.
+ */
+runTick = (ticks) => {
+    for(let i = 0; i < this.bots.length; ++i) {
+        if (!this.bots[i].mineland_is_active) continue
+
+        this.bots[i].chat('/runtick ' + ticks)
+        return true
+    }
+    return false
+}
+
+/**
+ * Wait until the runtick command of `id` is finished on the server.
+ * The finish is only printed in the server's output, so Bridge forwards it by /runtick_finished.
+ */
+waitForRuntickFinish = (id) => {
+    return new Promise(resolve => {
+        if (this.runtick_finished_id >= id) return resolve()
+        this.runtick_waiters.push({ id: id, resolve: resolve })
+    })
+}
+
+/**
+ * Mark the runtick commands up to `id` as finished, and resolve their waiters.
+ */
+finishRuntick = (id) => {
+    if (id !== Infinity) this.runtick_finished_id = Math.max(this.runtick_finished_id, id)
+    const remaining = []
+    for (const waiter of this.runtick_waiters) {
+        if (waiter.id <= id) {
+            waiter.resolve()
+        } else {
+            remaining.push(waiter)
+        }
+    }
+    this.runtick_waiters = remaining
+}
+
 allBotChat = (s) => {
     for(let i = 0; i < this.bots.length; ++i) {
         if (!this.bots[i].mineland_is_active) continue
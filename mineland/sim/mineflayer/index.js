@@ -3,22 +3,67 @@ const Vec3 = require("vec3");
 
 const express = require("express");
 
-const PORT = 21301;
+// The port can be specified by the first argument, e.g. `node index.js 21302`
+const PORT = parseInt(process.argv[2]) || 21301;
 const app = express();
 
 const BotManager = require("./bot_manager");
 const bot_manager = new BotManager()
 
+// Fields of observations which are omitted in delta mode if unchanged since the last sent observation
+const DELTA_FIELDS = ["equipment", "equip", "inventory_all", "inventory", "difficulty", "control_state"]
+// The serialized DELTA_FIELDS last sent of each bot, used in delta mode
+let observation_cache = []
+
 app.use(bodyParser.json({ limit: "50mb" }));
 app.use(bodyParser.urlencoded({ limit: "50mb", extended: false }));
 
+// ===== MessagePack Wire Format =====
+// MessagePack is optional, it's supported after `npm install @msgpack/msgpack`.
+// Bridge sends `Accept: application/msgpack` when wire_format="msgpack", and switches its request bodies
+// to msgpack once it receives a msgpack response. Otherwise json is used in both directions.
+const MSGPACK_TYPE = "application/msgpack"
+let msgpack = null
+try {
+    msgpack = require("@msgpack/msgpack")
+} catch (e) {
+    msgpack = null
+}
+if (msgpack !== null) {
+    app.use(bodyParser.raw({ type: MSGPACK_TYPE, limit: "50mb" }));
+    app.use((req, res, next) => {
+        if (req.is(MSGPACK_TYPE) && Buffer.isBuffer(req.body)) {
+            req.body = msgpack.decode(req.body)
+        }
+        next()
+    })
+}
+
+function acceptsMsgpack(req) {
+    return msgpack !== null && (req.get("Accept") || "").includes(MSGPACK_TYPE)
+}
+
+/**
+ * Send data in msgpack if the request accepts it, otherwise in json.
+ * In msgpack, Buffers are sent as raw bins.
+ */
+function sendData(req, res, status, data) {
+    if (!acceptsMsgpack(req)) {
+        return res.status(status).json(data)
+    }
+    const encoded = msgpack.encode(data)
+    res.status(status)
+    res.set('Content-Type', MSGPACK_TYPE)
+    res.send(Buffer.from(encoded.buffer, encoded.byteOffset, encoded.byteLength))
+}
+
 app.listen(PORT, () => {
     console.log(`JS side listener started on port ${PORT}`);
 });
 
 app.post("/start", async (req, res) => {
     if (!req.body.agents_count || !req.body.server_host || !req.body.server_port || !req.body.minecraft_version || !req.body.agents_config) {
-        return res.status(400).json({ return_code: 400, error: 'Missing required properties in the request body' });
+        return sendData(req, res, 400, { return_code: 400, error: 'Missing required properties in the request body' });
     }
     
     otherError = (err)=>{
@@ -27,11 +72,16 @@ app.post("/start", async (req, res) => {
     }
 
     bot_manager.stopAll()
+    observation_cache = []
     number_of_bot = req.body.agents_count;
     server_host = req.body.server_host;
     server_port = req.body.server_port;
     version = req.body.minecraft_version;
     configs = req.body.agents_config;
+    bot_manager.voxel_options = {
+        radius: req.body.voxel_radius !== undefined ? req.body.voxel_radius : 1,
+        is_compact: !!req.body.is_compact_voxels,
+    }
 
     for(var i = 0; i < number_of_bot; i++) {
         console.log(i + " : " + configs[i].name)
@@ -55,7 +105,7 @@ app.post("/start", async (req, res) => {
             console.log("Get Observation: " + i)
             obs.push(bot_manager.getBotObservation(i));
         }
-        res.status(200).json({
+        sendData(req, res, 200, {
             return_code: 200,
             observation: obs,
         })
@@ -63,18 +113,18 @@ app.post("/start", async (req, res) => {
 
 })
 
-app.post("/step_pre", (req, res) => {
-    data = req.body
+/**
+ * Execute the actions of a step.
+ * Return an error message if the actions are invalid, otherwise return null.
+ */
+function executeActions(data) {
     let ticks = data.ticks
     let is_low_level_action = data.is_low_level_action
     let bots_count = data.action.length
 
     // when bots_count !== bot_manager.bots.length, we need to throw an exception
     if(bots_count !== bot_manager.getBotNumber()) {
-        return res.status(404).json({
-            return_code: 404,
-            error: "Action length does not equal to the number of bots.",
-        })
+        return "Action length does not equal to the number of bots."
     }
 
     // ===== Start Global Catch Exceptions =====
@@ -85,11 +135,12 @@ app.post("/step_pre", (req, res) => {
         for(let i = 0; i < bots_count; i++) {
             if (!bot_manager.getBotIsActive(i)) continue;
 
-            // console.log("Low Level Action: ", req.body.action[i])
+            // console.log("Low Level Action: ", data.action[i])
 
             // TODO
             // 1. iterate action[0..7]
-            let actionList = JSON.parse(req.body.action[i]);
+            // LowLevelActionBatch sends a nested list, LowLevelAction sends a json string per bot
+            let actionList = Array.isArray(data.action[i]) ? data.action[i] : JSON.parse(data.action[i]);
             //转成list
 
             bot_manager.runLowLevelActionByOrder(i, actionList)
@@ -103,8 +154,8 @@ app.post("/step_pre", (req, res) => {
         for(let i = 0; i < bots_count; i++) {
             if (!bot_manager.getBotIsActive(i)) continue;
 
-            code = req.body.action[i].code;
-            if(req.body.action[i].type == 0) {
+            code = data.action[i].code;
+            if(data.action[i].type == 0) {
                 bot_manager.addCodeTick(i, ticks)
                 continue;
             }
@@ -116,44 +167,184 @@ app.post("/step_pre", (req, res) => {
     }
 
     // bot_manager.stopTpInterval();
+    return null
+}
+
+/**
+ * Collect observations, code infos and events of all bots after a step.
+ */
+function collectStepResult(is_delta_observation = false) {
+    bot_manager.updateBotsPositions();
+    bot_manager.startTpInterval();
+    obs = []
+    for(let i = 0; i < number_of_bot; i++) {
+        obs.push(bot_manager.getBotObservation(i));
+    }
+    if (is_delta_observation) {
+        encodeObservationDelta(obs)
+    }
+
+    codeInfo = []
+    for(let i = 0; i < number_of_bot; i++) {
+        codeInfo.push(bot_manager.getCodeInfo(i));
+    }
+    bot_manager.clearCodeErorrs()
+
+    events = []
+    for(let i = 0; i < number_of_bot; i++) {
+        events.push(bot_manager.getEvent(i));
+    }
+    bot_manager.clearEvents()
+
+    process.off('uncaughtException',otherError);
+    return {
+        return_code:200,
+        is_delta_observation: is_delta_observation,
+        observation: obs,
+        code_info: codeInfo,
+        event: events
+    }
+}
+
+/**
+ * Remove the DELTA_FIELDS which are unchanged since the last sent observation of each bot, in place.
+ * Bridge patches the removed fields from the observations it has received.
+ */
+function encodeObservationDelta(obs) {
+    for(let i = 0; i < obs.length; i++) {
+        if (obs[i] === null) {
+            // The bot is disconnected, send all fields when it's back
+            observation_cache[i] = undefined
+            continue
+        }
+        if (observation_cache[i] === undefined) observation_cache[i] = {}
+        for (const field of DELTA_FIELDS) {
+            const value = JSON.stringify(obs[i][field])
+            if (observation_cache[i][field] === value) {
+                delete obs[i][field]
+            } else {
+                observation_cache[i][field] = value
+            }
+        }
+    }
+}
+
+/**
+ * Send the result of a step.
+ * If is_binary_rgb is true, the RGB frames of all bots are sent as raw bytes instead of base64 strings:
+ *     [4 bytes: length of json (uint32, big-endian)][json][frames: bots * height * width * 3 (uint8)]
+ * The shape of frames is written in the X-Frame-Shape header.
+ * In msgpack, the frames are a raw bin field of the body instead. Bridge always requests binary RGB with msgpack.
+ */
+function sendStepResult(req, res, result, is_binary_rgb) {
+    if (!is_binary_rgb) {
+        return sendData(req, res, 200, result)
+    }
+
+    const frames = bot_manager.getBotsRawViews(number_of_bot)
+    for(let i = 0; i < result.observation.length; i++) {
+        if (result.observation[i] !== null) result.observation[i].rgb = ""
+    }
+
+    if (acceptsMsgpack(req)) {
+        // Frames are a raw bin inside the msgpack body
+        result.frames = frames
+        result.frame_shape = [number_of_bot, bot_manager.viewer_manager.image_height, bot_manager.viewer_manager.image_width, 3]
+        return sendData(req, res, 200, result)
+    }
+
+    const json = Buffer.from(JSON.stringify(result))
+    const json_length = Buffer.alloc(4)
+    json_length.writeUInt32BE(json.length)
+
+    res.status(200)
+    res.set('Content-Type', 'application/octet-stream')
+    res.set('X-Frame-Shape', [number_of_bot, bot_manager.viewer_manager.image_height, bot_manager.viewer_manager.image_width, 3].join(','))
+    res.send(Buffer.concat([json_length, json, frames]))
+}
+
+app.post("/step_pre", (req, res) => {
+    let error = executeActions(req.body)
+    if (error !== null) {
+        return sendData(req, res, 404, {
+            return_code: 404,
+            error: error,
+        })
+    }
     
     // ===== Run Ticks =====
-    res.status(200).json({ return_code:200 })
+    sendData(req, res, 200, { return_code:200 })
 })
 
-app.post("/step_lst", (req, res) => {
-    data = req.body
+/**
+ * Wait for `ticks` physics ticks of the bots, then get observations.
+ * In AUTO PAUSE mode, Bridge waits for the runtick command to finish on the server, and requests with ticks = 0.
+ */
+app.post("/step_lst", async (req, res) => {
+    const data = req.body
     let ticks = data.ticks
     
     // ===== Get Observations =====
-    setTimeout(()=>{
-        bot_manager.updateBotsPositions();
-        bot_manager.startTpInterval();
-        obs = []
-        for(let i = 0; i < number_of_bot; i++) {
-            obs.push(bot_manager.getBotObservation(i));
-        }
+    await bot_manager.waitForTicks(ticks)
+    sendStepResult(req, res, collectStepResult(data.is_delta_observation), data.is_binary_rgb)
+})
 
-        codeInfo = []
-        for(let i = 0; i < number_of_bot; i++) {
-            codeInfo.push(bot_manager.getCodeInfo(i));
-        }
-        bot_manager.clearCodeErorrs()
+/**
+ * Execute actions, run ticks and get observations in a single request.
+ * It equals to /step_pre + runtick + /step_lst.
+ * In AUTO PAUSE mode, the runtick command is sent by a bot, and the request is kept open
+ * until Bridge forwards the finish of the runtick `runtick_id` from the server by /runtick_finished,
+ * because the physics ticks of bots keep running in wall-clock time while the server is paused.
+ */
+app.post("/step", async (req, res) => {
+    const data = req.body
+    let ticks = data.ticks
 
-        events = []
-        for(let i = 0; i < number_of_bot; i++) {
-            events.push(bot_manager.getEvent(i));
+    let error = executeActions(data)
+    if (error !== null) {
+        return sendData(req, res, 404, {
+            return_code: 404,
+            error: error,
+        })
+    }
+
+    // ===== Run Ticks =====
+    if (data.runtick) {
+        // If no bot is active, the command can't be sent, and the paused server doesn't run at all
+        if (bot_manager.runTick(ticks)) {
+            await bot_manager.waitForRuntickFinish(data.runtick_id)
         }
-        bot_manager.clearEvents()
+    } else {
+        await bot_manager.waitForTicks(ticks)
+    }
 
-        process.off('uncaughtException',otherError);
-        res.status(200).json({
-            return_code:200,
-            observation: obs,
-            code_info: codeInfo,
-            event: events
-        })
-    }, ticks * 50)
+    // ===== Get Observations =====
+    sendStepResult(req, res, collectStepResult(data.is_delta_observation), data.is_binary_rgb)
+})
+
+/**
+ * The runtick command of `runtick_id` sent by /step is finished on the server.
+ */
+app.post("/runtick_finished", (req, res) => {
+    bot_manager.finishRuntick(req.body.runtick_id)
+    sendData(req, res, 200, { return_code:200 })
+})
+
+/**
+ * Reset the state of all bots, but keep them connected.
+ * Observations can be got by /step_lst after the server has executed reset commands.
+ */
+app.post("/soft_reset", (req, res) => {
+    bot_manager.resetAllBotsState()
+    res.status(200).json({ return_code:200 })
+})
+
+app.post("/block_table", (req, res) => {
+    const names = bot_manager.getBlockNames()
+    if (names === null) {
+        return res.status(400).json({ return_code: 400, error: 'No bot is connected' });
+    }
+    res.status(200).json({ return_code:200, names: names })
 })
 
 app.post("/end", (req, res) => {
@@ -230,28 +421,33 @@ app.post("/setSpawn", (req, res) => {
 
 app.post("/addCamera", (req, res) => {
     if (!req.body.camera_id || !req.body.image_width || !req.body.image_height) {
-        return res.status(400).json({return_code: 400, error: 'Missing required properties (camera_id or image_width or image_height) in the request body' });
+        return sendData(req, res, 400, {return_code: 400, error: 'Missing required properties (camera_id or image_width or image_height) in the request body' });
     }
     camera_id = req.body.camera_id;
     image_width = req.body.image_width;
     image_height = req.body.image_height;
     bot_manager.addCamera(camera_id, image_width, image_height);
-    res.status(200).json({return_code:200})
+    sendData(req, res, 200, {return_code:200})
 })
 
 app.post("/getCameraView", (req, res) => {
     if (!req.body.camera_id) {
-        return res.status(400).json({return_code: 400, error: 'Missing required properties (camera_id) in the request body' });
+        return sendData(req, res, 400, {return_code: 400, error: 'Missing required properties (camera_id) in the request body' });
     }
     camera_id = req.body.camera_id;
 
-    res.status(200).json({return_code: 200, rgb: bot_manager.getCameraView(camera_id)})
+    let rgb = bot_manager.getCameraView(camera_id)
+    if (acceptsMsgpack(req)) {
+        // The image is sent as a raw bin instead of base64, empty if the camera hasn't rendered yet
+        rgb = rgb ? Buffer.from(rgb, 'base64') : Buffer.alloc(0)
+    }
+    sendData(req, res, 200, {return_code: 200, rgb: rgb})
 })
 
 app.post("/updateCameraLocation", (req, res) => {
     console.log(req.body)
     if (req.body.camera_id === undefined || req.body.pos === undefined || req.body.yaw === undefined || req.body.pitch === undefined) {
-        return res.status(400).json({return_code: 400, error: 'Missing required properties (camera_id or pos or yaw or pitch) in the request body' });
+        return sendData(req, res, 400, {return_code: 400, error: 'Missing required properties (camera_id or pos or yaw or pitch) in the request body' });
     }
     console.log(req.body)
     camera_id = req.body.camera_id;
@@ -259,11 +455,11 @@ app.post("/updateCameraLocation", (req, res) => {
     yaw = req.body.yaw;
     pitch = req.body.pitch;
     bot_manager.modifyCameraLoc(camera_id, pos, yaw, pitch);
-    res.status(200).json({return_code:200})
+    sendData(req, res, 200, {return_code:200})
 })
 app.post("/addCameraLocation", (req, res) =>{
     if (req.body.camera_id === undefined || req.body.d_pos === undefined || req.body.d_yaw === undefined || req.body.d_pitch === undefined) {
-        return res.status(400).json({return_code: 400, error: 'Missing required properties (camera_id or d_pos or d_yaw or d_pitch) in the request body' });
+        return sendData(req, res, 400, {return_code: 400, error: 'Missing required properties (camera_id or d_pos or d_yaw or d_pitch) in the request body' });
     }
     console.log(req.body)
     camera_id = req.body.camera_id;
@@ -271,12 +467,12 @@ app.post("/addCameraLocation", (req, res) =>{
     d_yaw = req.body.d_yaw;
     d_pitch = req.body.d_pitch;
     bot_manager.addCameraLoc(camera_id, d_pos, d_yaw, d_pitch);
-    res.status(200).json({return_code:200})
+    sendData(req, res, 200, {return_code:200})
 })
 
 app.post("/moveCameraLocation", (req, res) =>{
     if (req.body.camera_id === undefined || req.body.d_pos === undefined || req.body.d_yaw === undefined || req.body.d_pitch === undefined) {
-        return res.status(400).json({return_code: 400, error: 'Missing required properties (camera_id or d_pos or d_yaw or d_pitch) in the request body' });
+        return sendData(req, res, 400, {return_code: 400, error: 'Missing required properties (camera_id or d_pos or d_yaw or d_pitch) in the request body' });
     }
     // console.log(req.body)
     camera_id = req.body.camera_id;
@@ -284,5 +480,5 @@ app.post("/moveCameraLocation", (req, res) =>{
     d_yaw = req.body.d_yaw;
     d_pitch = req.body.d_pitch;
     bot_manager.moveCameraLoc(camera_id, d_pos, d_yaw, d_pitch);
-    setTimeout(()=> {res.status(200).json({return_code:200})}, 2000)
+    setTimeout(()=> {sendData(req, res, 200, {return_code:200})}, 2000)
 })
@@ -15,7 +15,7 @@ class ObservationUtils {
     /**
      * Get the observation of a bot.
      */
-    static getObservation(bot, viewer_manager, tick) {
+    static getObservation(bot, viewer_manager, tick, voxel_options = { radius: 1, is_compact: false }) {
 
         let rgb_base64 = viewer_manager.getBotViewByName(bot.username)
         if (rgb_base64 === undefined) rgb_base64 = ""
@@ -69,7 +69,7 @@ class ObservationUtils {
 
             // ===== Voxels =====
             //MineDojo Style
-            voxels: this.getVoxels(bot),
+            voxels: voxel_options.is_compact ? this.getCompactVoxels(bot, voxel_options.radius) : this.getVoxels(bot, voxel_options.radius),
             // ===== Face Vector =====
             face_vector: this.getFaceVector(bot.entity.yaw, bot.entity.pitch),
             // ===== Life Statistics =====
@@ -226,29 +226,28 @@ class ObservationUtils {
         return result;
     }
     
-    static getVoxels(bot) {
-        let voxels = {
-            "block_name":[[[null,null,null],[null,null,null],[null,null,null]],[[null,null,null],[null,null,null],[null,null,null]],[[null,null,null],[null,null,null],[null,null,null]]],
-            "is_collidable":[[[null,null,null],[null,null,null],[null,null,null]],[[null,null,null],[null,null,null],[null,null,null]],[[null,null,null],[null,null,null],[null,null,null]]],
-            "is_tool_not_required":[[[null,null,null],[null,null,null],[null,null,null]],[[null,null,null],[null,null,null],[null,null,null]],[[null,null,null],[null,null,null],[null,null,null]]], 
-            "blocks_movement":[[[null,null,null],[null,null,null],[null,null,null]],[[null,null,null],[null,null,null],[null,null,null]],[[null,null,null],[null,null,null],[null,null,null]]],
-            "is_liquid":[[[null,null,null],[null,null,null],[null,null,null]],[[null,null,null],[null,null,null],[null,null,null]],[[null,null,null],[null,null,null],[null,null,null]]],
-            "is_solid":[[[null,null,null],[null,null,null],[null,null,null]],[[null,null,null],[null,null,null],[null,null,null]],[[null,null,null],[null,null,null],[null,null,null]]],
-            "can_burn":[[[null,null,null],[null,null,null],[null,null,null]],[[null,null,null],[null,null,null],[null,null,null]],[[null,null,null],[null,null,null],[null,null,null]]],
-            "blocks_light":[[[null,null,null],[null,null,null],[null,null,null]],[[null,null,null],[null,null,null],[null,null,null]],[[null,null,null],[null,null,null],[null,null,null]]],
-            "cos_look_vec_angle":[[[null,null,null],[null,null,null],[null,null,null]],[[null,null,null],[null,null,null],[null,null,null]],[[null,null,null],[null,null,null],[null,null,null]]],
+    /**
+     * Get the blocks around a bot, in MineDojo style.
+     * Each value is a (2 * radius + 1)^3 nested array indexed by the offsets [x][y][z].
+     */
+    static getVoxels(bot, radius = 1) {
+        const side = 2 * radius + 1
+        const keys = ["block_name", "is_collidable", "is_tool_not_required", "blocks_movement", "is_liquid", "is_solid", "can_burn", "blocks_light", "cos_look_vec_angle"]
+        let voxels = {}
+        for (const key of keys) {
+            voxels[key] = Array.from({ length: side }, () => Array.from({ length: side }, () => new Array(side).fill(null)))
         }
 
         // console.log(bot)
         if(!bot || !bot.entity) {
             return voxels;
         }
-        for(let i = 0; i < 3; ++i) {
-            for(let j = 0; j < 3; ++j) {
-                for(let k = 0; k < 3; ++k){
+        for(let i = 0; i < side; ++i) {
+            for(let j = 0; j < side; ++j) {
+                for(let k = 0; k < side; ++k){
                     
                     if(!('position' in bot.entity)) continue
-                    let block = bot.blockAt(bot.entity.position.offset(i - 1, j - 1, k - 1));
+                    let block = bot.blockAt(bot.entity.position.offset(i - radius, j - radius, k - radius));
                     if(block === null) continue
                     voxels.block_name[i][j][k] = block.name;
                     voxels.is_collidable[i][j][k] = block.diggable;
@@ -266,6 +265,44 @@ class ObservationUtils {
         // console.log(JSON.stringify(voxels,null, 2));
         return voxels;
     }
+
+    /**
+     * Get the blocks around a bot in a compact encoding.
+     * block_id is a base64 string of a uint16 array (block.type, 65535 means unloaded),
+     * flags is a base64 string of a uint8 array, whose bits are:
+     *     1: is_collidable, 2: is_tool_not_required, 4: is_liquid, 8: is_solid, 16: blocks_light
+     * Both arrays have (2 * radius + 1)^3 elements in [x][y][z] order.
+     */
+    static getCompactVoxels(bot, radius = 1) {
+        const side = 2 * radius + 1
+        const block_id = new Uint16Array(side * side * side).fill(65535)
+        const flags = new Uint8Array(side * side * side)
+
+        if(bot && bot.entity && ('position' in bot.entity)) {
+            const position = bot.entity.position
+            let index = 0
+            for(let i = 0; i < side; ++i) {
+                for(let j = 0; j < side; ++j) {
+                    for(let k = 0; k < side; ++k, ++index) {
+                        const block = bot.blockAt(position.offset(i - radius, j - radius, k - radius));
+                        if(block === null) continue
+                        block_id[index] = block.type
+                        flags[index] = (block.diggable ? 1 : 0)
+                            | (block.harvestTools ? 0 : 2)
+                            | ((block.boundingBox === 'empty' && block.name !== 'air') ? 4 : 0)
+                            | (block.boundingBox === 'block' ? 8 : 0)
+                            | (block.transparent ? 0 : 16)
+                    }
+                }
+            }
+        }
+
+        return {
+            radius: radius,
+            block_id: Buffer.from(block_id.buffer).toString('base64'),
+            flags: Buffer.from(flags.buffer).toString('base64'),
+        }
+    }
     static getFaceVector(yaw, pitch) {
         let face_vector = [-Math.sin(yaw), Math.sin(pitch), -Math.cos(yaw)]
         return face_vector
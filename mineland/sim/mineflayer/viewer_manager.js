@@ -1,4 +1,5 @@
 const net = require('net');
+const { Image, createCanvas } = require('canvas');
 // const puppeteer = require('puppeteer');
 // const mineflayerViewer = require('prismarine-viewer-colalab').mineflayer;
 const mineflayerHeadless = require('prismarine-viewer-colalab').headless;
@@ -40,6 +41,7 @@ class ViewerManager {
     constructor() {
         this.lock = undefined
         this.views = {}
+        this.raw_views = {} // name -> { base64, rgb }, cache of decoded frames
         this.image_width = 0
         this.image_height = 0
 
@@ -107,6 +109,35 @@ class ViewerManager {
         return this.views[name]
     }
 
+    /**
+     * Get the first person view image of the bot as raw RGB bytes (height * width * 3).
+     * The decoded frame is cached until the viewer produces a new image.
+     * Return null if the image is not available yet.
+     */
+    getBotRawViewByName(name) {
+        const view = this.views[name]
+        if (view === undefined || view === null || view === "") return null
+
+        const cache = this.raw_views[name]
+        if (cache !== undefined && cache.base64 === view) return cache.rgb
+
+        const img = new Image()
+        img.src = Buffer.from(view, 'base64')
+        const canvas = createCanvas(this.image_width, this.image_height)
+        const ctx = canvas.getContext('2d')
+        ctx.drawImage(img, 0, 0, this.image_width, this.image_height)
+        const rgba = ctx.getImageData(0, 0, this.image_width, this.image_height).data
+
+        const rgb = Buffer.alloc(this.image_width * this.image_height * 3)
+        for (let i = 0, j = 0; i < rgba.length; i += 4, j += 3) {
+            rgb[j] = rgba[i]
+            rgb[j + 1] = rgba[i + 1]
+            rgb[j + 2] = rgba[i + 2]
+        }
+        this.raw_views[name] = { base64: view, rgb: rgb }
+        return rgb
+    }
+
     /* ===== Camera ===== */
 
     /**
@@ -1,7 +1,8 @@
 import subprocess
+import collections
 import shlex
 import threading
-import time
+import re
 import os
 
 from ..utils import yellow_text, red_text
@@ -18,15 +19,20 @@ class MineflayerManager:
     def __init__(
         self,
         is_printing_mineflayer_info: bool = False,
-        wait_interval: float = 0.1
+        wait_interval: float = 0.1,
+        port: int = 21301,
+        max_output_lines: int = 10000,
     ):
         self.path = os.path.join(os.path.dirname(__file__), 'mineflayer')
+        self.port = port
         self.process = None
         self.stdout_thread = None
         self.stderr_thread = None
         self.is_printing_mineflayer_info = is_printing_mineflayer_info
-        self.is_running = False
+        self.running_event = threading.Event()
+        self.is_ended = False
         self.wait_interval = wait_interval
+        self.outputs = collections.deque(maxlen=max_output_lines)
 
         self.output_filter = [
             'physicTick',
@@ -35,21 +41,25 @@ class MineflayerManager:
         self.version_not_match_filter = [
             'DeprecationWarning',
         ]
+
+        self.output_filter_pattern = re.compile("|".join(re.escape(substr) for substr in self.output_filter))
+        self.version_not_match_pattern = re.compile("|".join(re.escape(substr) for substr in self.version_not_match_filter))
     
     def start(self):
         if not self.process or self.process.poll() is not None:
-            command = f"node index.js"
+            command = f"node index.js {self.port}"
             args = shlex.split(command)
 
             self.process = subprocess.Popen(args, cwd=self.path, shell=False, stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.PIPE, text=True)
 
             # TODO: Lack of exception handling
 
-            if self.is_printing_mineflayer_info:
-                self.stdout_thread = threading.Thread(target=self.listen_stdout)
-                if os.name == 'nt':
-                    self.stdout_thread.setDaemon(True)
-                self.stdout_thread.start()
+            # stdout must be read even if it's not printed, otherwise mineflayer blocks when the pipe is full
+            self.is_ended = False
+            self.stdout_thread = threading.Thread(target=self.listen_stdout)
+            if os.name == 'nt':
+                self.stdout_thread.setDaemon(True)
+            self.stdout_thread.start()
             
             self.stderr_thread = threading.Thread(target=self.listen_stderr)
             if os.name == 'nt':
@@ -62,42 +72,58 @@ class MineflayerManager:
             self.process.wait()
     
     def listen_stdout(self) :
-        print('Start to listen stdout.')
-        while True and self.process:
+        if self.is_printing_mineflayer_info:
+            print('Start to listen stdout.')
+        while self.process:
             output = self.process.stdout.readline()
 
+            # EOF, mineflayer is end
             if output == '':
-                continue
-            if any(substr in output for substr in self.version_not_match_filter):
+                break
+            if self.version_not_match_pattern.search(output):
                 print_error("Warning: Node.js version is not matched! Please use v18.18.2!")
 
             if 'started' in output:
-                self.is_running = True
-            print(output, end='')
-        print("Mineflayer is end.")
+                self.running_event.set()
+            if self.is_printing_mineflayer_info:
+                print(output, end='')
+            self.outputs.append(output)
+
+        # Unblock the waiting threads
+        self.is_ended = True
+        self.running_event.set()
+        if self.is_printing_mineflayer_info:
+            print("Mineflayer is end.")
     
     def listen_stderr(self) :
-        while True and self.process:
+        while self.process:
             output = self.process.stderr.readline()
 
+            # EOF, mineflayer is end
             if output == '':
-                continue
-            if any(substr in output for substr in self.output_filter):
+                break
+            if self.output_filter_pattern.search(output):
                 continue
             if output.isspace():
                 continue
-            if any(substr in output for substr in self.version_not_match_filter):
+            if self.version_not_match_pattern.search(output):
                 print_error("Warning: Node.js version is not matched! Please use v18.18.2!")
 
             print(output, end='')
+            self.outputs.append(output)
     
     def get(self, clear=True) :
-        ret = self.stdout[:]
+        ret = list(self.outputs)
         if clear:
-            self.stdout = []
+            self.outputs.clear()
         return ret
 
+    @property
+    def is_running(self):
+        return self.running_event.is_set()
+
     def wait_for_running(self):
-        while not self.is_running:
-            time.sleep(self.wait_interval)
-        self.is_running = False
+        self.running_event.wait()
+        self.running_event.clear()
+        if self.is_ended:
+            raise RuntimeError("[Mineflayer]", "Mineflayer is end before it's running, please check the outputs of mineflayer.")
@@ -0,0 +1,261 @@
+'''
+Profiler records the timings and payload sizes of the phases of each step, and writes them to sinks.
+'''
+
+import abc
+import csv
+import json
+import math
+import os
+import threading
+import time
+from typing import Dict, List
+
+class PhaseRecord:
+    '''
+    A phase of a step.
+
+    Attributes:
+        name (str): The name of the phase, e.g. "/step_lst", "decode", "observation".
+        start (float): The start time, in seconds of time.perf_counter().
+        duration (float): The duration, in seconds.
+        size (int): The payload size in bytes, or None.
+        agent (int): The index of the agent, or None if the phase is not per agent.
+    '''
+
+    __slots__ = ("name", "start", "duration", "size", "agent")
+
+    def __init__(self, name: str, start: float, duration: float, size: int = None, agent: int = None):
+        self.name = name
+        self.start = start
+        self.duration = duration
+        self.size = size
+        self.agent = agent
+
+class _Phase:
+    '''
+    Context manager of a phase, created by Profiler.phase().
+    '''
+
+    __slots__ = ("profiler", "name", "agent", "start", "size")
+
+    def __init__(self, profiler, name: str, agent: int = None):
+        self.profiler = profiler
+        self.name = name
+        self.agent = agent
+        self.size = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.record(self.name, self.start, time.perf_counter() - self.start, self.size, self.agent)
+        return False
+
+class _NullPhase:
+    '''
+    A phase which records nothing, used when profiling is disabled.
+    '''
+
+    __slots__ = ("size",)
+
+    def __init__(self):
+        self.size = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+NULL_PHASE = _NullPhase()
+
+class Profiler:
+    def __init__(self, sinks: List["ProfileSink"] = None, enabled: bool = True):
+        '''
+        Record the phases of each step, and write them to the sinks when the step ends.
+
+        Example:
+            >>> mland = mineland.MineLand(agents_count=2, profile=True)
+            >>> ...
+            >>> print(mland.profiler.sinks[0].summary())
+
+        Args:
+            sinks (List[ProfileSink]): Where the records are written. Default is [HistogramSink()].
+            enabled (bool): If False, nothing is recorded.
+        '''
+        self.sinks = sinks if sinks is not None else [HistogramSink()]
+        self.enabled = enabled
+        self.step_index = 0
+        self.records = []
+        self.lock = threading.Lock()
+
+    def phase(self, name: str, agent: int = None):
+        '''
+        Get a context manager which records the time of a phase.
+        The payload size can be set by `phase.size = ...` inside the context.
+        '''
+        if not self.enabled:
+            return NULL_PHASE
+        return _Phase(self, name, agent)
+
+    def record(self, name: str, start: float, duration: float, size: int = None, agent: int = None):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.records.append(PhaseRecord(name, start, duration, size, agent))
+
+    def end_step(self):
+        '''
+        Write the records of the current step to the sinks.
+        '''
+        if not self.enabled:
+            return
+        with self.lock:
+            records, self.records = self.records, []
+            step_index = self.step_index
+            self.step_index += 1
+        for sink in self.sinks:
+            sink.write(step_index, records)
+
+    def end_reset(self):
+        '''
+        Write the records out of step(), e.g. of reset() and add_an_agent(), to the sinks as a "reset" step,
+        whose step_index is None, so that they aren't counted in the next step.
+        '''
+        if not self.enabled:
+            return
+        with self.lock:
+            records, self.records = self.records, []
+        if len(records) == 0:
+            return
+        for sink in self.sinks:
+            sink.write(None, records)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+# ===== Sinks =====
+
+class ProfileSink(abc.ABC):
+    '''
+    The base class of sinks. write() is called with the records of each step.
+    step_index is None for the records of reset() and add_an_agent(), which are not in a step.
+    '''
+    @abc.abstractmethod
+    def write(self, step_index: int, records: List[PhaseRecord]):
+        pass
+
+    def close(self):
+        pass
+
+class HistogramSink(ProfileSink):
+    '''
+    Keep the statistics of each phase in memory, with a histogram of durations in power-of-2 milliseconds.
+    '''
+    def __init__(self):
+        # phase name -> {"count", "total", "max", "size_count", "size_total", "buckets": {upper bound in ms: count}}
+        self.stats = {}
+        self.steps = 0
+
+    def write(self, step_index: int, records: List[PhaseRecord]):
+        if step_index is not None:
+            self.steps += 1
+        for record in records:
+            stats = self.stats.get(record.name)
+            if stats is None:
+                stats = {"count": 0, "total": 0.0, "max": 0.0, "size_count": 0, "size_total": 0, "buckets": {}}
+                self.stats[record.name] = stats
+            stats["count"] += 1
+            stats["total"] += record.duration
+            stats["max"] = max(stats["max"], record.duration)
+            if record.size is not None:
+                stats["size_count"] += 1
+                stats["size_total"] += record.size
+            duration_ms = record.duration * 1000
+            bucket = 2 ** math.ceil(math.log2(duration_ms)) if duration_ms > 0.001 else 0.001
+            stats["buckets"][bucket] = stats["buckets"].get(bucket, 0) + 1
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        '''
+        Returns:
+            Dict[str, Dict[str, float]]: phase name -> {count, mean_ms, max_ms, per_step_ms, mean_size, histogram}.
+                                         mean_size is in bytes, histogram is {upper bound in ms: count}.
+        '''
+        ret = {}
+        for name, stats in self.stats.items():
+            ret[name] = {
+                "count": stats["count"],
+                "mean_ms": stats["total"] / stats["count"] * 1000,
+                "max_ms": stats["max"] * 1000,
+                "per_step_ms": stats["total"] / max(self.steps, 1) * 1000,
+                "mean_size": stats["size_total"] / stats["size_count"] if stats["size_count"] > 0 else None,
+                "histogram": dict(sorted(stats["buckets"].items())),
+            }
+        return ret
+
+    def clear(self):
+        self.stats = {}
+        self.steps = 0
+
+class CSVSink(ProfileSink):
+    '''
+    Write a row per phase: step, phase, agent, start_ms, duration_ms, size.
+    The step of the records out of step() is "reset".
+    '''
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(["step", "phase", "agent", "start_ms", "duration_ms", "size"])
+
+    def write(self, step_index: int, records: List[PhaseRecord]):
+        for record in records:
+            self.writer.writerow([
+                "reset" if step_index is None else step_index,
+                record.name,
+                "" if record.agent is None else record.agent,
+                f"{record.start * 1000:.3f}",
+                f"{record.duration * 1000:.3f}",
+                "" if record.size is None else record.size,
+            ])
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+class ChromeTraceSink(ProfileSink):
+    '''
+    Write the phases in Chrome trace format, which can be opened by chrome://tracing or https://ui.perfetto.dev.
+    The file is written when the sink is closed (when MineLand is closed).
+    '''
+    def __init__(self, path: str):
+        self.path = path
+        self.events = []
+        self.is_closed = False
+
+    def write(self, step_index: int, records: List[PhaseRecord]):
+        for record in records:
+            args = {"step": "reset" if step_index is None else step_index}
+            if record.size is not None:
+                args["size"] = record.size
+            self.events.append({
+                "name": record.name,
+                "ph": "X",
+                "ts": record.start * 1e6,
+                "dur": record.duration * 1e6,
+                "pid": 0,
+                # per agent phases are shown in their own rows
+                "tid": 0 if record.agent is None else record.agent + 1,
+                "args": args,
+            })
+
+    def close(self):
+        if self.is_closed:
+            return
+        self.is_closed = True
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
@@ -3,12 +3,15 @@ ServerManager is used to manage the server process.
 '''
 
 import subprocess
-import shlex
+import collections
 import threading
+import re
 import time
 import os
 import shutil
+from typing import List
 
+from .world_snapshot import WorldSnapshot
 from ..utils import blue_text, red_text
 
 std_print = print
@@ -19,35 +22,115 @@ def print_error(*args, end='\n'):
     text = [red_text(str(arg)) for arg in args]
     std_print("[Server Error]", *text, end=end)
 
-# TODO: 多线程管理！ServerManager和MineflayerManager都需要多线程管理！
-#       特别是 is_running 和 is_runtick_finished 这两个变量，如果数据不一致的话，会导致整个服务器卡死！
+SERVER_JAR = "fabric-server-mc.1.19-loader.0.14.18-launcher.0.11.2.jar"
+
+# Files and directories of the server which are shared by all instances (read-only, or caches)
+SHARED_FILES = [SERVER_JAR, "mods", "libraries", ".fabric"]
+# Files and directories of the server which are copied into each instance
+COPIED_FILES = ["config", "eula.txt", "ops.json", "banned-ips.json", "banned-players.json", "whitelist.json"]
+
+# JVM flags of garbage collectors
+GC_PROFILES = {
+    "g1": ["-XX:+UseG1GC", "-XX:MaxGCPauseMillis=50"],
+    "zgc": ["-XX:+UseZGC"],
+    "shenandoah": ["-XX:+UseShenandoahGC"],
+    # Aikar's flags, refer to https://docs.papermc.io/paper/aikars-flags
+    "aikar": [
+        "-XX:+UseG1GC", "-XX:+ParallelRefProcEnabled", "-XX:MaxGCPauseMillis=200",
+        "-XX:+UnlockExperimentalVMOptions", "-XX:+DisableExplicitGC", "-XX:+AlwaysPreTouch",
+        "-XX:G1NewSizePercent=30", "-XX:G1MaxNewSizePercent=40", "-XX:G1HeapRegionSize=8M",
+        "-XX:G1ReservePercent=20", "-XX:G1HeapWastePercent=5", "-XX:G1MixedGCCountTarget=4",
+        "-XX:InitiatingHeapOccupancyPercent=15", "-XX:G1MixedGCLiveThresholdPercent=90",
+        "-XX:G1RSetUpdatingPauseTimePercent=5", "-XX:SurvivorRatio=32", "-XX:+PerfDisableSharedMem",
+        "-XX:MaxTenuringThreshold=1",
+    ],
+}
 
 class ServerManager:
     def __init__(
         self,
-        max_memory="2G",
+        max_memory="8G",
         wait_interval: float = 0.1,
-        is_printing_server_info: bool = False
+        is_printing_server_info: bool = False,
+        port: int = 25565,
+        instance_dir: str = None,
+        min_memory: str = None,
+        gc: str = None,
+        jvm_args: List[str] = None,
+        view_distance: int = None,
+        simulation_distance: int = None,
+        jfr_path: str = None,
+        max_output_lines: int = 10000,
     ):
         '''
         Initialize the server manager.
 
         Args:
             path (str): The path of the server.
-            max_memory (str): The maximum memory of the server.
-            wait_interval (float): The minimum unit of time for waiting for the server to start and complete a tick.
+            max_memory (str): The maximum heap size of the server, e.g. "2G".
+            wait_interval (float): Deprecated. Waiting for the server to start and complete a tick is event-driven now.
             is_printing_server_info (bool): Whether to print the server information.
+            port (int): The port of the server.
+            instance_dir (str): The directory of an isolated server instance (world, logs and properties).
+                                If it's None, the server runs in the default server directory,
+                                or in `server/instances/port_<port>` if port is not 25565 or
+                                view_distance / simulation_distance is provided.
+            min_memory (str): The initial heap size of the server. Default is the JVM's default (or max_memory for "aikar").
+            gc (str): The garbage collector profile, one of "g1", "zgc", "shenandoah" and "aikar". Default is the JVM's default.
+            jvm_args (List[str]): Extra arguments of the JVM.
+            view_distance (int): The view-distance of server.properties of the instance. Default is unchanged.
+            simulation_distance (int): The simulation-distance of server.properties of the instance. Default is unchanged.
+            jfr_path (str): If provided, record the server by Java Flight Recorder, and dump to this path when the server exits.
+            max_output_lines (int): The maximum number of output lines kept by get(), the oldest lines are dropped.
         '''
-        self.path = os.path.join(os.path.dirname(__file__), 'server')
+        self.base_path = os.path.join(os.path.dirname(__file__), 'server')
+
+        # The properties of this instance, over the server.properties of the default server directory
+        self.server_properties = {
+            "server-port": port,
+            "query.port": port,
+        }
+        if view_distance is not None:
+            self.server_properties["view-distance"] = view_distance
+        if simulation_distance is not None:
+            self.server_properties["simulation-distance"] = simulation_distance
+
+        if instance_dir is None and (port != 25565 or len(self.server_properties) > 2):
+            # The properties are written into server.properties, which must not be the shipped one
+            instance_dir = os.path.join(self.base_path, 'instances', f"port_{port}")
+        self.path = self.base_path if instance_dir is None else instance_dir
+        self.port = port
         self.max_memory = max_memory
-        if max_memory != "2G":
-            assert False, "TODO: Only 2G memory is supported for now"
+        self.min_memory = min_memory
+        if gc is not None and gc not in GC_PROFILES:
+            raise ValueError(f"Invalid gc: {gc}, must be one of {list(GC_PROFILES.keys())}.")
+        self.gc = gc
+        self.jvm_args = jvm_args if jvm_args is not None else []
+        self.jfr_path = jfr_path
         self.process = None
         self.thread = None
-        self.outputs = []
-        self.is_running = False
-        self.is_runtick_finished = True
+        self.outputs = collections.deque(maxlen=max_output_lines)
         self.wait_interval = wait_interval
+        self.is_ended = False
+
+        # Counters of key events in the outputs, see listen_outputs
+        self.stats = {
+            "cant_keep_up": 0,      # "Can't keep up! Is the server overloaded?"
+            "lag_ms": 0,            # total milliseconds behind, reported by "Can't keep up!"
+            "lag_ticks": 0,         # total ticks behind, reported by "Can't keep up!"
+            "runtick_finished": 0,
+            "warnings": 0,
+            "errors": 0,
+        }
+
+        # is_running and is_runtick_finished are signaled by listen_outputs thread
+        self.running_event = threading.Event()
+        self.runtick_finished_event = threading.Event()
+        self.runtick_finished_event.set()
+
+        # Timing of runtick, in seconds
+        self.runtick_start_time = None
+        self.last_runtick_duration = None
         self.is_printing_server_info = is_printing_server_info
 
         self.output_filter = [
@@ -66,33 +149,120 @@ class ServerManager:
             'Perhaps a server is already running on that port'
         ]
 
-    def select_to_construction_world(self) :
-        src_folder = os.path.join(self.path, 'construction_world')
-        dst_folder = os.path.join(self.path, 'world')
-        if not os.path.exists(src_folder):
-            return
-        if os.path.exists(dst_folder):
-            shutil.rmtree(dst_folder)
-        shutil.copytree(src_folder, dst_folder)
-        pass
+        self.output_filter_pattern = re.compile("|".join(re.escape(substr) for substr in self.output_filter))
+        self.another_server_is_running_pattern = re.compile("|".join(re.escape(substr) for substr in self.another_server_is_running_filter))
+        self.cant_keep_up_pattern = re.compile(r"Can't keep up!.*?Running (\d+)ms or (\d+) ticks behind")
 
+        if instance_dir is not None:
+            self.prepare_instance()
+
+    def prepare_instance(self):
+        '''
+        Prepare the server directory, so that several servers can run on the same host.
+        The jar, mods and libraries are shared with the default server directory by symlinks,
+        the others are copied, and server.properties is rebuilt from the default server directory
+        with the properties of this instance, so the properties of a previous run don't remain.
+        '''
+        os.makedirs(self.path, exist_ok=True)
+
+        for name in SHARED_FILES:
+            src = os.path.join(self.base_path, name)
+            dst = os.path.join(self.path, name)
+            if os.path.lexists(dst):
+                continue
+            if not os.path.exists(src):
+                # Caches (libraries, .fabric) are downloaded by the first server into the default directory
+                os.makedirs(src)
+            try:
+                os.symlink(src, dst, target_is_directory=os.path.isdir(src))
+            except OSError:
+                # Symlinks may be unavailable (e.g. Windows without privilege)
+                if os.path.isdir(src):
+                    shutil.copytree(src, dst)
+                else:
+                    shutil.copy2(src, dst)
+
+        for name in COPIED_FILES:
+            src = os.path.join(self.base_path, name)
+            dst = os.path.join(self.path, name)
+            if os.path.exists(dst) or not os.path.exists(src):
+                continue
+            if os.path.isdir(src):
+                shutil.copytree(src, dst)
+            else:
+                shutil.copy2(src, dst)
+
+        shutil.copy2(os.path.join(self.base_path, 'server.properties'), os.path.join(self.path, 'server.properties'))
+        self.set_server_properties(self.server_properties)
+
+    def set_server_properties(self, properties):
+        '''
+        Rewrite the properties in server.properties of this server instance.
+        The properties that don't exist are appended.
+        The server.properties of the default server directory is shipped with MineLand, and never rewritten.
+        '''
+        if os.path.abspath(self.path) == os.path.abspath(self.base_path):
+            raise RuntimeError("server.properties of the default server directory can't be rewritten, use an instance_dir instead.")
+
+        src = os.path.join(self.base_path, 'server.properties')
+        dst = os.path.join(self.path, 'server.properties')
+        with open(dst if os.path.exists(dst) else src, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+
+        remaining = {key: str(value) for key, value in properties.items()}
+        for i, line in enumerate(lines):
+            key = line.split('=', 1)[0]
+            if not line.startswith('#') and key in remaining:
+                lines[i] = f"{key}={remaining.pop(key)}"
+        for key, value in remaining.items():
+            lines.append(f"{key}={value}")
+
+        with open(dst, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+
+    def select_to_construction_world(self) :
+        self.select_world('construction_world')
 
     def select_to_normal_world(self) :
-        src_folder = os.path.join(self.path, 'test_world')
+        self.select_world('test_world')
+
+    def select_world(self, world_name):
+        '''
+        Restore the world of the server from a template world in the default server directory.
+        Only the files touched in the last run are copied back, see WorldSnapshot.
+        '''
+        src_folder = os.path.join(self.base_path, world_name)
         dst_folder = os.path.join(self.path, 'world')
         if not os.path.exists(src_folder):
             return
-        if os.path.exists(dst_folder):
-            shutil.rmtree(dst_folder)
-        shutil.copytree(src_folder, dst_folder)
-        pass
+        copied_count = WorldSnapshot(src_folder, dst_folder).restore()
+        if self.is_printing_server_info:
+            print(f'World is restored from {world_name}, {copied_count} file(s) copied.')
+
+    def get_java_args(self) -> List[str]:
+        '''
+        Get the command line to launch the server.
+        '''
+        args = ["java", f"-Xmx{self.max_memory}"]
+        min_memory = self.min_memory
+        if min_memory is None and self.gc == "aikar":
+            min_memory = self.max_memory # Aikar's flags recommend the same initial and maximum heap size
+        if min_memory is not None:
+            args.append(f"-Xms{min_memory}")
+        if self.gc is not None:
+            args += GC_PROFILES[self.gc]
+        if self.jfr_path is not None:
+            args.append(f"-XX:StartFlightRecording=filename={os.path.abspath(self.jfr_path)},settings=profile,dumponexit=true")
+        args += self.jvm_args
+        args += ["-jar", SERVER_JAR, "nogui"]
+        return args
 
     def start(self):
         if not self.process or self.process.poll() is not None:
-            command = f"java -Xmx8G -jar fabric-server-mc.1.19-loader.0.14.18-launcher.0.11.2.jar nogui"
-            args = shlex.split(command)
+            self.is_ended = False
+            args = self.get_java_args()
 
-            self.process = subprocess.Popen(args, cwd=self.path, shell=False, stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.PIPE, text=True)
+            self.process = subprocess.Popen(args, cwd=self.path, shell=False, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, text=True)
 
             # TODO: Lack of exception handling
             
@@ -125,43 +295,115 @@ class ServerManager:
         if self.is_printing_server_info:
             print('Start to listen outputs.')
         
-        while True and self.process:
+        while self.process:
             output = self.process.stdout.readline()
 
+            # EOF, the server is end
+            if output == '':
+                break
+
             if 'Done' in output:
-                self.is_running = True
+                self.running_event.set()
+            if 'runtick command started' in output:
+                self.runtick_start_time = time.perf_counter()
             if 'runtick command is finished now' in output:
-                self.is_runtick_finished = True
+                if self.runtick_start_time is not None:
+                    self.last_runtick_duration = time.perf_counter() - self.runtick_start_time
+                    self.runtick_start_time = None
+                self.stats["runtick_finished"] += 1
+                self.runtick_finished_event.set()
 
-            if output == '':
-                continue
-            if any(substr in output for substr in self.output_filter):
+            match = self.cant_keep_up_pattern.search(output)
+            if match:
+                self.stats["cant_keep_up"] += 1
+                self.stats["lag_ms"] += int(match.group(1))
+                self.stats["lag_ticks"] += int(match.group(2))
+            if '/WARN]' in output:
+                self.stats["warnings"] += 1
+            elif '/ERROR]' in output:
+                self.stats["errors"] += 1
+
+            if self.output_filter_pattern.search(output):
                 continue
-            if any(substr in output for substr in self.another_server_is_running_filter):
+            if self.another_server_is_running_pattern.search(output):
                 print_error('Another server is running! You may need to restart MineLand.')
             
             if self.is_printing_server_info:
                 print(output, end='')
             self.outputs.append(output)
 
+        # Unblock the waiting threads
+        self.is_ended = True
+        self.running_event.set()
+        self.runtick_finished_event.set()
+
         if self.is_printing_server_info:
             print("Server is end.")
     
     def get(self, clear=True) :
-        ret = self.outputs[:]
+        ret = list(self.outputs)
         if clear:
-            self.outputs = []
+            self.outputs.clear()
         return ret
+
+    def get_stats(self):
+        '''
+        Get the counters of key events in the outputs of the server.
+        '''
+        return dict(self.stats)
     
+    @property
+    def is_running(self):
+        return self.running_event.is_set()
+
+    @is_running.setter
+    def is_running(self, value):
+        if value:
+            self.running_event.set()
+        else:
+            self.running_event.clear()
+
+    @property
+    def is_runtick_finished(self):
+        return self.runtick_finished_event.is_set()
+
+    @is_runtick_finished.setter
+    def is_runtick_finished(self, value):
+        if value:
+            self.runtick_finished_event.set()
+        else:
+            self.runtick_finished_event.clear()
+
+    def runtick(self, ticks: int):
+        '''
+        Run ticks on the paused server.
+        The finished flag is cleared before the command is sent, so that the finish can't be missed.
+        '''
+        self.runtick_finished_event.clear()
+        return self.execute(f"runtick {ticks}")
+
     def wait_for_running(self):
-        while not self.is_running:
-            time.sleep(self.wait_interval)
-        self.is_running = False
+        self.running_event.wait()
+        self.running_event.clear()
+        if self.is_ended:
+            raise RuntimeError("[Server]", "The server is end before it's running, please check the outputs of the server.")
     
-    def wait_for_runtick_finish(self):
-        while not self.is_runtick_finished:
-            time.sleep(self.wait_interval)
-        self.is_runtick_finished = False
+    def wait_for_runtick_finish(self, timeout: float = None, consume: bool = True) -> bool:
+        '''
+        Wait until the last runtick command is finished, then consume the finished flag.
+
+        Args:
+            consume (bool): Whether to clear the finished flag. If False, the next wait returns immediately,
+                            which is used to observe the finish before the next step waits for it.
+
+        Returns:
+            bool: False if timeout, otherwise True.
+        '''
+        if not self.runtick_finished_event.wait(timeout):
+            return False
+        if consume:
+            self.runtick_finished_event.clear()
+        return True
     
 
 
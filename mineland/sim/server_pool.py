@@ -0,0 +1,133 @@
+'''
+ServerPool is used to keep several servers and mineflayers running, which can be leased by environments.
+'''
+
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+from .server_manager import ServerManager
+from .mineflayer_manager import MineflayerManager
+from ..utils import get_free_ports, cyan_text
+
+std_print = print
+def print(*args, end='\n'):
+    text = [cyan_text(str(arg)) for arg in args]
+    std_print("[ServerPool]", *text, end=end)
+
+class PooledServer:
+    '''
+    A server and a mineflayer leased from the ServerPool.
+    '''
+    def __init__(
+        self,
+        server_manager: ServerManager,
+        mineflayer_manager: MineflayerManager,
+        server_port: int,
+        mineflayer_port: int,
+    ):
+        self.server_manager = server_manager
+        self.mineflayer_manager = mineflayer_manager
+        self.server_port = server_port
+        self.mineflayer_port = mineflayer_port
+
+class ServerPool:
+    def __init__(
+        self,
+        size: int,
+        world_type: str = "normal",
+        instances_dir: str = None,
+        is_printing_server_info: bool = False,
+        is_printing_mineflayer_info: bool = False,
+        **server_config,
+    ):
+        '''
+        Start `size` servers and mineflayers in parallel, and keep them running.
+
+        Example:
+            >>> pool = mineland.ServerPool(size=2)
+            >>> for task_id in task_ids:
+            >>>     mland = mineland.make(task_id=task_id, agents_count=1, server_pool=pool)
+            >>>     ...
+            >>>     mland.close()    # the server is returned to the pool
+            >>> pool.close()
+
+        Args:
+            size (int): The number of servers.
+            world_type (str): The world of servers, "normal" or "construction".
+            instances_dir (str): The directory to store the server instances.
+                                 Default is `mineland/sim/server/pool`.
+            server_config: The arguments passed to ServerManager, e.g. max_memory, gc, view_distance.
+        '''
+        if instances_dir is None:
+            instances_dir = os.path.join(os.path.dirname(__file__), 'server', 'pool')
+
+        self.size = size
+        self.world_type = world_type
+        self.instances_dir = instances_dir
+        self.is_printing_server_info = is_printing_server_info
+        self.is_printing_mineflayer_info = is_printing_mineflayer_info
+        self.server_config = server_config
+
+        self.servers = []
+        self.available = queue.Queue()
+
+        print(f"Starting {size} server(s)...")
+        ports = get_free_ports(2 * size)
+        with ThreadPoolExecutor(max_workers=size) as executor:
+            self.servers = list(executor.map(
+                lambda i: self.start_server(i, ports[2 * i], ports[2 * i + 1]),
+                range(size),
+            ))
+        for server in self.servers:
+            self.available.put(server)
+        print(f"{size} server(s) started.")
+
+    def start_server(self, index: int, server_port: int, mineflayer_port: int) -> PooledServer:
+        server_manager = ServerManager(
+            is_printing_server_info=self.is_printing_server_info,
+            port=server_port,
+            instance_dir=os.path.join(self.instances_dir, f"server_{index}"),
+            **self.server_config,
+        )
+        if self.world_type == "normal":
+            server_manager.select_to_normal_world()
+        else:
+            server_manager.select_to_construction_world()
+        server_manager.start()
+        server_manager.wait_for_running()
+
+        mineflayer_manager = MineflayerManager(
+            is_printing_mineflayer_info=self.is_printing_mineflayer_info,
+            port=mineflayer_port,
+        )
+        mineflayer_manager.start()
+        mineflayer_manager.wait_for_running()
+
+        return PooledServer(server_manager, mineflayer_manager, server_port, mineflayer_port)
+
+    def lease(self, timeout: float = None) -> PooledServer:
+        '''
+        Lease a running server. Block until a server is available.
+        '''
+        try:
+            return self.available.get(timeout=timeout)
+        except queue.Empty:
+            raise RuntimeError(f"No server is available in the pool after {timeout} seconds.")
+
+    def release(self, server: PooledServer):
+        '''
+        Return a server to the pool. The bots should have been disconnected.
+        The entities left by the last environment are removed.
+        '''
+        server.server_manager.execute("tp @e[type=!minecraft:player] 0 -100 0")
+        server.server_manager.execute("time set 0")
+        server.server_manager.execute("weather clear")
+        server.server_manager.execute("difficulty peaceful")
+        self.available.put(server)
+
+    def close(self):
+        for server in self.servers:
+            server.mineflayer_manager.shutdown()
+            server.server_manager.shutdown()
+        self.servers = []
@@ -1,5 +1,8 @@
 import gymnasium as gym
 import threading
+import asyncio
+import string
+import math
 import time
 
 from typing import Tuple, List, Dict, Union
@@ -8,13 +11,17 @@ from mineland.sim.data.task_info import TaskInfo
 
 from .server_manager import ServerManager
 from .mineflayer_manager import MineflayerManager
+from .server_pool import ServerPool
 from .sound_system import SoundSystem
 from .bridge import Bridge
+from .profiler import Profiler, ProfileSink
 from .data import Action
 from .data import LowLevelAction
+from .data import LowLevelActionBatch
 from .data import Observation
 from .data import CodeInfo
 from .data import Event
+from .data import BlockTable
 from ..utils import green_text, red_text
 
 std_print = print
@@ -38,15 +45,42 @@ class MineLand(gym.Env):
         enable_auto_pause: bool = False,
         enable_sound_system: bool = False,
         enable_low_level_action: bool = False,
+        enable_fused_step: bool = False,
 
         server_host: str = None,
         server_port: int = None,
 
+        local_server_port: int = 25565,
+        mineflayer_port: int = 21301,
+        instance_dir: str = None,
+        server_pool: ServerPool = None,
+
+        server_max_memory: str = "8G",
+        server_min_memory: str = None,
+        server_gc: str = None,
+        server_jvm_args: List[str] = None,
+        server_view_distance: int = None,
+        server_simulation_distance: int = None,
+        server_jfr_path: str = None,
+
         headless: bool = False,
         image_size: Tuple[int, int] = (144, 256),
+        enable_binary_rgb: bool = False,
+        rgb_decode_mode: str = "eager",
+        enable_compact_voxels: bool = False,
+        voxel_radius: int = 1,
+        enable_delta_observation: bool = False,
+        json_decoder: str = "auto",
+        wire_format: str = "json",
 
         is_printing_server_info: bool = True,
         is_printing_mineflayer_info: bool = True,
+
+        http_pool_size: int = 4,
+        http_max_retries: int = 3,
+
+        profile: bool = False,
+        profile_sinks: List[ProfileSink] = None,
     ):
 
         print("MineLand Simulator is initializing...")
@@ -56,24 +90,75 @@ class MineLand(gym.Env):
         self.enable_auto_pause = enable_auto_pause
         self.enable_sound_system = enable_sound_system
         self.enable_low_level_action = enable_low_level_action
+        self.enable_fused_step = enable_fused_step
 
         self.agents_count = agents_count
         self.agents_config = agents_config
         self.image_size = image_size
+        self.enable_compact_voxels = enable_compact_voxels
+        self.voxel_radius = voxel_radius
+
+        if voxel_radius < 0:
+            raise ValueError(f"Invalid voxel_radius: {voxel_radius}, must be non-negative.")
+
+        if rgb_decode_mode not in ("eager", "lazy", "never"):
+            raise ValueError(f"Invalid rgb_decode_mode: {rgb_decode_mode}, must be one of 'eager', 'lazy' and 'never'.")
+
+        # ===== Spaces =====
+        # Observations are returned as Observation objects, which have no gymnasium space.
+        # observation_space is defined by StructuredObservationWrapper.
+        if enable_low_level_action:
+            self.action_space = LowLevelActionBatch.space(agents_count)
+        else:
+            self.action_space = gym.spaces.Tuple([
+                gym.spaces.Dict({
+                    "type": gym.spaces.Discrete(2),
+                    "code": gym.spaces.Text(max_length=65536, charset=string.printable),
+                })
+                for _ in range(agents_count)
+            ])
 
         self.is_reset = False
         self.is_closed = False
+        self.step_timing = None
+
+        # ===== Profiler =====
+        self.profiler = Profiler(sinks=profile_sinks, enabled=profile)
+        self.reset_snapshot = None
 
         # ===== Default Config =====
         if self.agents_config is None:
             self.agents_config = [{"name": f"MineflayerBot{i}"} for i in range(agents_count)]
         
         # ===== Server =====
-        if server_host is None:
+        self.server_pool = server_pool
+        self.pooled_server = None
+        if server_pool is not None:
+            if server_host is not None:
+                raise ValueError("server_host should not be provided when server_pool is used.")
+            print("Leasing server from the server pool...")
+            self.pooled_server = server_pool.lease()
             self.server_host = "localhost"
-            self.server_port = 25565
+            self.server_port = self.pooled_server.server_port
+            self.server_manager = self.pooled_server.server_manager
+            mineflayer_port = self.pooled_server.mineflayer_port
+            print("Server leased, port:", self.server_port)
+        elif server_host is None:
+            self.server_host = "localhost"
+            self.server_port = local_server_port
             print("Starting server...")
-            self.server_manager = ServerManager(is_printing_server_info=is_printing_server_info)
+            self.server_manager = ServerManager(
+                is_printing_server_info=is_printing_server_info,
+                port=self.server_port,
+                instance_dir=instance_dir,
+                max_memory=server_max_memory,
+                min_memory=server_min_memory,
+                gc=server_gc,
+                jvm_args=server_jvm_args,
+                view_distance=server_view_distance,
+                simulation_distance=server_simulation_distance,
+                jfr_path=server_jfr_path,
+            )
             if world_type == "normal":
                 self.server_manager.select_to_normal_world()
                 print("We're using the normal world")
@@ -109,16 +194,23 @@ class MineLand(gym.Env):
             for i in range(agents_count):
                 self.server_manager.execute(f"op {self.agents_config[i]['name']}")
 
-        # Wait for start
-        time.sleep(3)
-
         # ===== Mineflayer =====
-        print("Mineflayer is starting.")
-        mineflayer_manager = MineflayerManager(is_printing_mineflayer_info=is_printing_mineflayer_info)
-        mineflayer_manager.start()
-        mineflayer_manager.wait_for_running()
-        # time.sleep(1)
-        print("Mineflayer started.")
+        if self.pooled_server is not None:
+            # The mineflayer of the pool is already running
+            mineflayer_manager = self.pooled_server.mineflayer_manager
+        else:
+            # Wait for start
+            time.sleep(3)
+
+            print("Mineflayer is starting.")
+            mineflayer_manager = MineflayerManager(
+                is_printing_mineflayer_info=is_printing_mineflayer_info,
+                port=mineflayer_port,
+            )
+            mineflayer_manager.start()
+            mineflayer_manager.wait_for_running()
+            # time.sleep(1)
+            print("Mineflayer started.")
 
         # ===== Sound System =====
         if self.enable_sound_system:
@@ -133,19 +225,75 @@ class MineLand(gym.Env):
             ticks_per_step=self.ticks_per_step,
             enable_auto_pause=self.enable_auto_pause,
             enable_low_level_action=self.enable_low_level_action,
+            enable_fused_step=self.enable_fused_step,
             image_size=self.image_size,
             minecraft_server_host=self.server_host,
             minecraft_server_port=self.server_port,
             mineflayer_manager=mineflayer_manager,
             server_manager=self.server_manager,
+            mineflayer_port=mineflayer_port,
             headless=headless,
+            enable_binary_rgb=enable_binary_rgb,
+            rgb_decode_mode=rgb_decode_mode,
+            enable_compact_voxels=enable_compact_voxels,
+            voxel_radius=voxel_radius,
+            enable_delta_observation=enable_delta_observation,
+            json_decoder=json_decoder,
+            wire_format=wire_format,
+            profiler=self.profiler,
+            pool_size=http_pool_size,
+            max_retries=http_max_retries,
         )
         
         print("MineLand Simulator is initialized.")
 
-    def reset(self) -> List[Observation]:
+    def reset(self, soft: bool = False) -> List[Observation]:
+        """Reset the environment.
+
+        Args:
+            soft (bool): If True and the environment has been reset before, restore the bots' state
+                         from the snapshot taken in the first reset, while the server and mineflayer keep running.
+                         The terrain is not restored.
+
+        Returns:
+            List[Observation]: The observations after reset.
+        """
+        if soft and self.is_reset:
+            return self._soft_reset()
+
         print("Starting reset... This may take a few seconds.")
         obs = self.bridge.reset()
+        obs = self._after_reset(obs)
+        if self.server_manager is not None and self.enable_auto_pause:
+            # The runtick of reset is finished here, step() only waits for the runtick of its own ticks
+            self.server_manager.wait_for_runtick_finish()
+        return obs
+
+    async def areset(self, soft: bool = False) -> List[Observation]:
+        """The asynchronous version of reset(). See reset() for details.
+        """
+        if soft and self.is_reset:
+            return await asyncio.to_thread(self._soft_reset)
+
+        print("Starting reset... This may take a few seconds.")
+        obs = await self.bridge.areset()
+        obs = self._after_reset(obs)
+        if self.server_manager is not None and self.enable_auto_pause:
+            await asyncio.to_thread(self.server_manager.wait_for_runtick_finish)
+        return obs
+
+    def _after_reset(self, obs: List[Observation]) -> List[Observation]:
+        if self.bridge.wire_format == "msgpack" and not self.bridge.is_msgpack_accepted:
+            print_error("wire_format is msgpack, but mineflayer doesn't support it, json is used instead. You can install it by `npm install @msgpack/msgpack` in mineland/sim/mineflayer.")
+
+        # Snapshot of bots' state, which is restored by soft reset
+        self.reset_snapshot = {
+            "time": obs[0].time if len(obs) > 0 and obs[0] is not None else 0,
+            "location": [
+                (ob.location_stats['pos'], ob.location_stats['yaw'], ob.location_stats['pitch']) if ob is not None else None
+                for ob in obs
+            ],
+        }
 
         if self.server_manager is not None:
             # Clear the inventory of all bots
@@ -159,8 +307,8 @@ class MineLand(gym.Env):
 
             if self.enable_auto_pause:
                 # Runtick 20 ticks (1 second) to execute all preset commands
-                self.server_manager.execute("runtick 20")
-                self.server_manager.is_runtick_finished = False # Force server to wait 20 ticks, then step
+                # Force server to wait 20 ticks, then step
+                self.server_manager.runtick(20)
 
         print("Reset finished. MineLand Simulator is started.")
         if self.enable_auto_pause:
@@ -169,17 +317,73 @@ class MineLand(gym.Env):
             print("You didn't enable AUTO PAUSE mode, the minecraft game is running now.")
 
         self.is_reset = True
+        self.profiler.end_reset()
+
+        return obs
+
+    def _soft_reset(self) -> List[Observation]:
+        print("Starting soft reset...")
+
+        if self.server_manager is not None and self.enable_auto_pause:
+            # Consume the runtick of the last step
+            self.server_manager.wait_for_runtick_finish()
+
+        self.bridge.soft_reset()
+
+        if self.server_manager is not None:
+            # Remove all entities except players, without dropping items
+            self.server_manager.execute("tp @e[type=!minecraft:player] 0 -100 0")
+
+            # Reset inventory, effects, experience, health and food
+            self.server_manager.execute("clear @a")
+            self.server_manager.execute("effect clear @a")
+            self.server_manager.execute("xp set @a 0 levels")
+            self.server_manager.execute("xp set @a 0 points")
+            self.server_manager.execute("effect give @a minecraft:instant_health 1 10")
+            self.server_manager.execute("effect give @a minecraft:saturation 1 10")
+
+            # Restore bots' locations
+            for i in range(self.agents_count):
+                name = self.agents_config[i]['name']
+                self.server_manager.execute(f"gamemode survival {name}")
+                if i < len(self.reset_snapshot["location"]) and self.reset_snapshot["location"][i] is not None:
+                    pos, yaw, pitch = self.reset_snapshot["location"][i]
+                    # Mineflayer's yaw and pitch are radians, convert them to minecraft's degrees
+                    mc_yaw = math.degrees(math.pi - yaw)
+                    mc_pitch = math.degrees(-pitch)
+                    self.server_manager.execute(f"tp {name} {pos[0]} {pos[1]} {pos[2]} {mc_yaw:.2f} {mc_pitch:.2f}")
+
+            # Restore the world
+            self.server_manager.execute(f"time set {self.reset_snapshot['time']}")
+            self.server_manager.execute("weather clear")
+
+            if self.enable_auto_pause:
+                # Runtick 20 ticks (1 second) to execute all preset commands
+                self.server_manager.runtick(20)
+
+        if self.enable_sound_system:
+            self.sound_system = SoundSystem(self.agents_count, registry=self.sound_system.registry)
+            self.sound_last_tick = 0
+
+        if self.server_manager is not None and self.enable_auto_pause:
+            self.server_manager.wait_for_runtick_finish(consume=False)
+            obs = self.bridge.observe(ticks=0)
+        else:
+            obs = self.bridge.observe(ticks=20)
 
+        print("Soft reset finished.")
+        self.profiler.end_reset()
         return obs
 
     def step(
         self,
-        action: List[Union[Action, LowLevelAction]]
+        action: Union[List[Union[Action, LowLevelAction]], LowLevelActionBatch]
     ) -> Tuple[List[Observation], List[CodeInfo], List[Event], bool, TaskInfo]:
         """Step the environment.
 
         Args:
             action (List[Action]): The list of (action types and codes) that needs to be executed.
+                                   In low-level action mode, a list of LowLevelAction or a LowLevelActionBatch.
 
         Returns:
             Tuple[List[Observation], List[CodeInfo], List[Event], bool, TaskInfo]: The result of step.
@@ -187,9 +391,38 @@ class MineLand(gym.Env):
         if not self.is_reset:
             raise RuntimeError("You must call reset() before calling step().")
 
-        if self.server_manager is not None and self.enable_auto_pause:
-                self.server_manager.wait_for_runtick_finish()
-        
+        step_start_time = time.perf_counter()
+        self._check_action(action)
+        obs, code_info, event = self.bridge.step(action)
+        return self._after_step(obs, code_info, event, step_start_time)
+
+    async def astep(
+        self,
+        action: Union[List[Union[Action, LowLevelAction]], LowLevelActionBatch]
+    ) -> Tuple[List[Observation], List[CodeInfo], List[Event], bool, TaskInfo]:
+        """The asynchronous version of step(). See step() for details.
+
+        The requests to mineflayer don't block the event loop, so that many environments can be
+        stepped concurrently in a single thread, e.g. by asyncio.gather(*[env.astep(a) for ...]).
+        """
+        if not self.is_reset:
+            raise RuntimeError("You must call reset() before calling step().")
+
+        step_start_time = time.perf_counter()
+        self._check_action(action)
+        obs, code_info, event = await self.bridge.astep(action)
+        return self._after_step(obs, code_info, event, step_start_time)
+
+    def _check_action(self, action: Union[List[Union[Action, LowLevelAction]], LowLevelActionBatch]):
+        with self.profiler.phase("check_action"):
+            self._check_action_type(action)
+
+    def _check_action_type(self, action: Union[List[Union[Action, LowLevelAction]], LowLevelActionBatch]):
+        if isinstance(action, LowLevelActionBatch):
+            if not self.enable_low_level_action:
+                print_error("You didn't enable low-level action, but you are using low-level action.")
+            return
+
         if self.enable_low_level_action:
             if any(isinstance(a, Action) for a in action):
                 print_error("You enabled low-level action, but you are using high-level action.")
@@ -197,12 +430,38 @@ class MineLand(gym.Env):
             if any(isinstance(a, LowLevelAction) for a in action):
                 print_error("You didn't enable low-level action, but you are using low-level action.")
 
-        obs, code_info, event = self.bridge.step(action)
+    def _after_step(
+        self,
+        obs: List[Observation],
+        code_info: List[CodeInfo],
+        event: List[Event],
+        step_start_time: float,
+    ) -> Tuple[List[Observation], List[CodeInfo], List[Event], bool, TaskInfo]:
+        # Timing breakdown of this step, in seconds
+        #     wait: waiting for the server to finish the runtick of this step (0 without auto pause)
+        #     node: the requests to mineflayer, and the ticks of this step without auto pause
+        #     server_tick: the time the server spent on the runtick of this step
+        step_time = time.perf_counter() - step_start_time
+        self.step_timing = {
+            "wait": self.bridge.last_runtick_wait,
+            "node": step_time - self.bridge.last_runtick_wait,
+            "server_tick": self.server_manager.last_runtick_duration if self.server_manager is not None else None,
+        }
 
         if self.enable_sound_system:
-            for i in range(self.agents_count):
-                obs[i].sound = self.sound_system.get(i, self.sound_last_tick, obs[0].tick, event[i])
-            self.sound_last_tick = obs[0].tick
+            with self.profiler.phase("sound"):
+                # Mix the sound of all connected agents in one pass
+                connected = {i: event[i] for i in range(self.agents_count) if obs[i] is not None}
+                cur_tick = next(obs[i].tick for i in connected) if len(connected) > 0 else self.sound_last_tick
+                location_stats = {i: obs[i].location_stats for i in connected}
+                sounds = self.sound_system.get_all(self.sound_last_tick, cur_tick, connected, location_stats)
+                for sound, i in zip(sounds, connected):
+                    obs[i].sound = sound
+            self.sound_last_tick = cur_tick
+
+        if self.profiler.enabled:
+            self.profiler.record("step", step_start_time, time.perf_counter() - step_start_time)
+            self.profiler.end_step()
 
         return obs, code_info, event, False, None
     
@@ -223,12 +482,21 @@ class MineLand(gym.Env):
             self.server_manager.execute(f"gamemode survival {config['name']}")
         
         if self.enable_sound_system:
-            assert False, "TODO: Sound System supports for adding agents."
+            self.sound_system.add_agent()
 
         self.bridge.add_an_agent(config)
+        self.profiler.end_reset()
     
+    def get_block_table(self) -> BlockTable:
+        """Get the table between block ids and block names, which is used by compact voxels.
+        """
+        if not self.is_reset:
+            raise RuntimeError("You must call reset() before calling get_block_table().")
+        return self.bridge.get_block_table()
+
     def disconnect_an_agent(self, name: str):
         self.bridge.disconnect_an_agent(name)
+        self.profiler.end_reset()
 
     def render(self, mode: str = 'human'):
         pass
@@ -239,7 +507,42 @@ class MineLand(gym.Env):
         
         if self.is_closed:
             return
+        self.is_closed = True
+        self.profiler.close()
+
+        if self.server_pool is not None:
+            # Return the server and mineflayer to the pool, instead of shutting them down
+            self.bridge.close(shutdown_mineflayer=False)
+            if self.enable_auto_pause:
+                # The pause command toggles the pause state, so it unpauses the server here
+                self.server_manager.execute("pause")
+            self.server_pool.release(self.pooled_server)
+            return
+
         self.bridge.close()
         if self.server_manager is not None:
             self.server_manager.shutdown()
         return
+
+    async def aclose(self):
+        """The asynchronous version of close(). See close() for details.
+        """
+        if not self.is_reset:
+            raise RuntimeError("You must call reset() before calling step().")
+        
+        if self.is_closed:
+            return
+        self.is_closed = True
+        self.profiler.close()
+
+        if self.server_pool is not None:
+            await self.bridge.aclose(shutdown_mineflayer=False)
+            if self.enable_auto_pause:
+                self.server_manager.execute("pause")
+            self.server_pool.release(self.pooled_server)
+            return
+
+        await self.bridge.aclose()
+        if self.server_manager is not None:
+            await asyncio.to_thread(self.server_manager.shutdown)
+        return
@@ -0,0 +1,116 @@
+'''
+SoundRegistry maps the events of mineflayer to the sound clips, which is loaded from a json file.
+'''
+
+from pydub import AudioSegment
+from typing import Dict, List, Union
+import fnmatch
+import json
+import os
+import numpy as np
+
+DEFAULT_REGISTRY_PATH = os.path.join(os.path.dirname(__file__), '..', 'assets', 'sounds', 'sounds.json')
+
+# Decoded clips shared by all registries, (absolute path, sample rate) -> float32 mono PCM
+_decoded_clips = {}
+
+class SoundClip:
+    '''
+    A sound clip, which is decoded on the first use.
+
+    Attributes:
+        name (str): The name of the clip.
+        path (str): The path of the audio file.
+        volume (float): The gain of the clip, 1.0 is the original volume.
+        max_distance (float): The distance (in blocks) at which the clip becomes silent.
+    '''
+
+    __slots__ = ("name", "path", "volume", "max_distance")
+
+    def __init__(self, name: str, path: str, volume: float = 1.0, max_distance: float = 16.0):
+        self.name = name
+        self.path = os.path.abspath(path)
+        self.volume = volume
+        self.max_distance = max_distance
+
+    def pcm(self, sample_rate: int) -> np.ndarray:
+        key = (self.path, sample_rate)
+        if key not in _decoded_clips:
+            audio = AudioSegment.from_file(self.path).set_frame_rate(sample_rate).set_channels(1).set_sample_width(2)
+            _decoded_clips[key] = np.frombuffer(audio.raw_data, dtype=np.int16).astype(np.float32) / 32768
+        return _decoded_clips[key]
+
+class SoundRegistry:
+    def __init__(self, path: str = None):
+        '''
+        Load the clips and the rules from event to clip.
+
+        The json file has two keys:
+            "clips": {name: {"file": path relative to the json file, "volume": 1.0, "max_distance": 16.0}}
+            "events": [{"type": event type, "name": entity or block name(s), "clip": clip name}]
+        "name" of a rule can be a string or a list, and supports wildcards like "*_log".
+        A rule without "name" matches all events of its type. The first matched rule is used.
+
+        Example:
+            >>> registry = SoundRegistry()
+            >>> registry.register_clip("skeleton_hurt", "/path/to/skeleton_hurt.ogg")
+            >>> registry.register_event("entityHurt", "skeleton_hurt", name="skeleton")
+
+        Args:
+            path (str): The json file. Default is `mineland/assets/sounds/sounds.json`.
+        '''
+        if path is None:
+            path = DEFAULT_REGISTRY_PATH
+
+        self.clips = {}
+        # event type -> [(name patterns or None, clip name)]
+        self.rules = {}
+        # (event type, name) -> clip name or None, the result of matching the rules
+        self.dispatch = {}
+
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        base_dir = os.path.dirname(path)
+        for name, clip in data.get("clips", {}).items():
+            self.register_clip(
+                name,
+                os.path.join(base_dir, clip["file"]),
+                volume=clip.get("volume", 1.0),
+                max_distance=clip.get("max_distance", 16.0),
+            )
+        for rule in data.get("events", []):
+            self.register_event(rule["type"], rule["clip"], name=rule.get("name"))
+
+    def register_clip(self, name: str, path: str, volume: float = 1.0, max_distance: float = 16.0):
+        self.clips[name] = SoundClip(name, path, volume, max_distance)
+
+    def register_event(self, type: str, clip: str, name: Union[str, List[str]] = None):
+        '''
+        Add a rule from event to clip. The rule is matched after the existing rules of the same type.
+        '''
+        if clip not in self.clips:
+            raise ValueError(f"Unknown sound clip: {clip}, register it by register_clip() first.")
+        if isinstance(name, str):
+            name = [name]
+        self.rules.setdefault(type, []).append((name, clip))
+        self.dispatch = {}
+
+    def lookup(self, event: Dict) -> SoundClip:
+        '''
+        Get the clip of an event, or None if the event has no sound.
+        '''
+        type = event['type']
+        name = event.get('entity_name', event.get('block_name'))
+        key = (type, name)
+        if key not in self.dispatch:
+            self.dispatch[key] = self.__match(type, name)
+        clip = self.dispatch[key]
+        return self.clips[clip] if clip is not None else None
+
+    def __match(self, type: str, name: str) -> str:
+        for patterns, clip in self.rules.get(type, []):
+            if patterns is None:
+                return clip
+            if name is not None and any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns):
+                return clip
+        return None
@@ -1,53 +1,216 @@
 from pydub import AudioSegment
-import os
+from typing import Dict, List
+import numpy as np
+
+from .sound_registry import SoundRegistry
 
 class SoundSystem:
-    def __init__(self, agents_count):
+    '''
+    Mix the sounds of events heard by each agent, in stereo.
+
+    The clip of an event is looked up in the SoundRegistry, and decoded into PCM on its first use.
+    Its gain of each channel is computed from the distance and direction between the agent and the event,
+    for all events of a step in one vectorized pass.
+
+    The sound of all agents is kept in a ring buffer of shape (agents, capacity, 2), indexed by the
+    absolute sample position (tick * SAMPLES_PER_TICK) modulo capacity. An event adds its clip into the
+    buffer at its tick, and get() reads the samples between two ticks and clears them, so a step only
+    touches the samples of its own ticks and of the clips it adds.
+    '''
+
+    SAMPLE_RATE = 44100
+    SAMPLES_PER_TICK = SAMPLE_RATE // 20 # 1 tick = 50 ms
+    CHANNELS = 2
+
+    def __init__(self, agents_count, registry: SoundRegistry = None):
+        '''
+        Args:
+            agents_count (int): The number of agents.
+            registry (SoundRegistry): The clips and the rules from event to clip. Default is SoundRegistry().
+        '''
         self.agents_count = agents_count
-        self.sounds = [AudioSegment.silent(duration=0)] * agents_count
+        self.registry = registry if registry is not None else SoundRegistry()
+
+        self.capacity = self.__ceil_pow2(2 * 20 * self.SAMPLES_PER_TICK)
+        self.buffer = np.zeros((agents_count, self.capacity, self.CHANNELS), dtype=np.float32)
+
+        # The tick from which each agent hasn't read
         self.ticks = [0] * agents_count
 
-        self.path = os.path.join(os.path.dirname(__file__), '../assets/sounds/')
+    @classmethod
+    def to_audio_segment(cls, sound: np.ndarray) -> AudioSegment:
+        '''
+        Convert the sound returned by get() into an AudioSegment, e.g. to export it by `.export("a.wav", format="wav")`.
+        '''
+        return AudioSegment(data=sound.tobytes(), sample_width=2, frame_rate=cls.SAMPLE_RATE, channels=cls.CHANNELS)
 
-        self.audio = {}
-        self.audio['zombie_hurt'] = AudioSegment.from_file(self.path + 'zombie_hurt.ogg')
-        self.audio['dirt_break'] = AudioSegment.from_file(self.path + 'dirt_break.ogg')
+    # ===== Agents =====
 
-    def get(self, id, last_tick, cur_tick, events):
+    def add_agent(self):
+        '''
+        Add an agent, whose index is the last one.
+        '''
+        self.buffer = np.concatenate([self.buffer, np.zeros((1, self.capacity, self.CHANNELS), dtype=np.float32)])
+        self.ticks.append(max(self.ticks) if len(self.ticks) > 0 else 0)
+        self.agents_count += 1
+
+    def remove_agent(self, id):
+        '''
+        Remove an agent. The indices of the following agents are decreased by 1.
+        '''
         assert(id >= 0 and id < self.agents_count), "id should be in the range of [0, agents_count)"
+        self.buffer = np.delete(self.buffer, id, axis=0)
+        del self.ticks[id]
+        self.agents_count -= 1
 
-        # Make sure the length of the sound >= (cur_tick - last_tick) * 50 * 2
-        if len(self.sounds[id]) == 0 or self.ticks[id] + len(self.sounds[id]) < last_tick:
-            self.sounds[id] = AudioSegment.silent(duration=(cur_tick - last_tick) * 50 * 2)
-            self.ticks[id] = last_tick
-        elif self.ticks[id] < last_tick:
-            self.sounds[id] = self.sounds[id][(last_tick - self.ticks[id]) * 50:]
-            self.ticks[id] = last_tick
-        
-        if len(self.sounds[id]) < (cur_tick - last_tick) * 50 * 2:
-            self.sounds[id] += AudioSegment.silent(duration=(cur_tick - last_tick) * 50 * 2 - len(self.sounds[id]))
-
-        # Update the sound
-        for event in events:
-            audio = None
-            if event['type'] == 'entityHurt':
-                if event['entity_name'] == 'zombie':
-                    audio = self.audio['zombie_hurt']
-            elif event['type'] == 'blockIsBeingBroken':
-                audio = self.audio['dirt_break']
-            
-            if audio is not None:
-                self.__update(id, last_tick, cur_tick, event['tick'], audio)
-        
-        assert(len(self.sounds[id]) >= (cur_tick - last_tick) * 50), "sound length should be greater than or equal to (cur_tick - last_tick) * 50"
-
-        ret = self.sounds[id][: (cur_tick - last_tick) * 50]
-        self.sounds[id] = self.sounds[id][(cur_tick - last_tick) * 50:]
+    # ===== Mixing =====
 
-        return ret
-    
-    def __update(self, id, last_tick, cur_tick, tick, audio):
+    def get(self, id, last_tick, cur_tick, events, location_stats: Dict = None) -> np.ndarray:
+        '''
+        Get the sound heard by an agent between last_tick and cur_tick.
+
+        Returns:
+            np.ndarray: int16 stereo PCM at SAMPLE_RATE, of shape ((cur_tick - last_tick) * SAMPLES_PER_TICK, 2).
+        '''
+        assert(id >= 0 and id < self.agents_count), "id should be in the range of [0, agents_count)"
+        locations = {id: location_stats} if location_stats is not None else None
+        return self.get_all(last_tick, cur_tick, {id: events}, locations)[0]
+
+    def get_all(self, last_tick, cur_tick, events: Dict[int, List], location_stats: Dict[int, Dict] = None) -> np.ndarray:
+        '''
+        Get the sound heard by the agents between last_tick and cur_tick.
+
+        Args:
+            events (Dict[int, List] | List[List]): The events of each agent, by index.
+                                                   Only the sound of these agents is returned.
+            location_stats (Dict[int, Dict] | List[Dict]): The location_stats of each agent, by index.
+                                                           If None, or an event has no position,
+                                                           the event is heard at full volume in both channels.
+
+        Returns:
+            np.ndarray: int16 stereo PCM at SAMPLE_RATE,
+                        of shape (len(events), (cur_tick - last_tick) * SAMPLES_PER_TICK, 2).
+        '''
+        if not isinstance(events, dict):
+            events = dict(enumerate(events))
+        if location_stats is not None and not isinstance(location_stats, dict):
+            location_stats = dict(enumerate(location_stats))
+        ids = list(events.keys())
+
+        # Find the clips of events
+        sources = [] # (id, tick, clip, event position)
+        for id in ids:
+            for event in events[id]:
+                clip = self.registry.lookup(event)
+                if clip is not None:
+                    sources.append((id, event['tick'], clip, event.get('position')))
+        pcms = [clip.pcm(self.SAMPLE_RATE) for _, _, clip, _ in sources]
+
+        length = (cur_tick - last_tick) * self.SAMPLES_PER_TICK
+        needed = length + max((len(pcm) for pcm in pcms), default=0)
+        if needed > self.capacity:
+            self.__grow(self.__ceil_pow2(needed))
+
+        # Clear the samples of the skipped ticks, which may hold the tails of old clips
+        for id in ids:
+            if self.ticks[id] < last_tick:
+                self.__clear(id, self.ticks[id] * self.SAMPLES_PER_TICK, last_tick * self.SAMPLES_PER_TICK)
+
+        if len(sources) > 0:
+            gains = self.__gains(sources, location_stats)
+            for (id, tick, _, _), pcm, gain in zip(sources, pcms, gains):
+                self.__add(id, last_tick, cur_tick, tick, pcm, gain)
+
+        start = last_tick * self.SAMPLES_PER_TICK
+        ret = self.__read(ids, start, length)
+        for id in ids:
+            self.__clear(id, start, start + length)
+            self.ticks[id] = cur_tick
+
+        return (np.clip(ret, -1, 1) * 32767).astype(np.int16)
+
+    def __gains(self, sources, location_stats) -> np.ndarray:
+        '''
+        Compute the gains of (left, right) channels of all sources.
+
+        The gain decreases linearly with the distance to 0 at the max_distance of the clip,
+        and is panned by the direction of the source relative to the agent's facing.
+        A source in front of or behind the agent has the full gain in both channels,
+        and a source on the right is silent in the left channel, vice versa.
+
+        Returns:
+            np.ndarray: float32 of shape (len(sources), 2).
+        '''
+        count = len(sources)
+        volume = np.array([clip.volume for _, _, clip, _ in sources], dtype=np.float32)
+        max_distance = np.array([clip.max_distance for _, _, clip, _ in sources], dtype=np.float32)
+
+        # Sources without positions (or agents without locations) are at the agent
+        listener = np.zeros((count, 3), dtype=np.float32)
+        yaw = np.zeros(count, dtype=np.float32)
+        source = np.zeros((count, 3), dtype=np.float32)
+        for k, (id, _, _, position) in enumerate(sources):
+            location = location_stats.get(id) if location_stats is not None else None
+            if location is None or position is None:
+                continue
+            listener[k] = location['pos']
+            yaw[k] = location['yaw']
+            source[k] = (position['x'], position['y'], position['z']) if isinstance(position, dict) else position
+
+        offset = source - listener
+        distance = np.linalg.norm(offset, axis=1)
+        attenuation = np.clip(1 - distance / max_distance, 0, 1)
+
+        # The right of the agent, when the forward is (-sin(yaw), 0, -cos(yaw))
+        right = np.stack([np.cos(yaw), np.zeros(count, dtype=np.float32), -np.sin(yaw)], axis=1)
+        pan = np.sum(offset * right, axis=1) / np.maximum(distance, 1e-6) # -1 (left) to 1 (right)
+        channels = np.stack([np.minimum(1 - pan, 1), np.minimum(1 + pan, 1)], axis=1)
+
+        return (channels * (volume * attenuation)[:, None]).astype(np.float32)
+
+    def __add(self, id, last_tick, cur_tick, tick, pcm, gain):
         assert(last_tick <= tick and tick <= cur_tick), "tick should be in the range of [last_tick, cur_tick]"
 
-        self.sounds[id] = self.sounds[id].overlay(audio, position=(tick - last_tick) * 50)
+        if not gain.any():
+            return
+        for ring_start, ring_end, src_start, src_end in self.__slices(tick * self.SAMPLES_PER_TICK, len(pcm)):
+            self.buffer[id, ring_start:ring_end] += pcm[src_start:src_end, None] * gain
+
+    def __read(self, ids, start, length) -> np.ndarray:
+        ret = np.empty((len(ids), length, self.CHANNELS), dtype=np.float32)
+        for ring_start, ring_end, dst_start, dst_end in self.__slices(start, length):
+            ret[:, dst_start:dst_end] = self.buffer[ids, ring_start:ring_end]
+        return ret
+
+    def __clear(self, id, start, end):
+        length = min(end - start, self.capacity)
+        for ring_start, ring_end, _, _ in self.__slices(start, length):
+            self.buffer[id, ring_start:ring_end] = 0
+
+    def __slices(self, start, length):
+        '''
+        Split [start, start + length) of absolute sample positions into at most 2 contiguous slices of the ring.
+
+        Returns:
+            List[Tuple[int, int, int, int]]: (ring_start, ring_end, offset_start, offset_end)
+        '''
+        ring_start = start % self.capacity
+        first = min(length, self.capacity - ring_start)
+        ret = [(ring_start, ring_start + first, 0, first)]
+        if first < length:
+            ret.append((0, length - first, first, length))
+        return ret
+
+    def __grow(self, capacity):
+        # The content is indexed by absolute positions, rebuild it for the new capacity
+        # from the unread position of each agent
+        contents = [self.__read([id], self.ticks[id] * self.SAMPLES_PER_TICK, self.capacity)[0] for id in range(self.agents_count)]
+        self.capacity = capacity
+        self.buffer = np.zeros((self.agents_count, capacity, self.CHANNELS), dtype=np.float32)
+        for id, content in enumerate(contents):
+            for ring_start, ring_end, src_start, src_end in self.__slices(self.ticks[id] * self.SAMPLES_PER_TICK, len(content)):
+                self.buffer[id, ring_start:ring_end] = content[src_start:src_end]
 
+    @staticmethod
+    def __ceil_pow2(value):
+        return 1 << max(int(value) - 1, 1).bit_length()
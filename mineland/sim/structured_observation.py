@@ -0,0 +1,170 @@
+'''
+StructuredObservation converts the observations of all agents into a dict of numpy arrays,
+which can be consumed by RL frameworks directly.
+'''
+
+from typing import List, Dict, Tuple
+
+import gymnasium as gym
+import numpy as np
+
+from .data import Observation
+from .data.observation import VOXEL_FLAGS
+
+class StructuredObservation:
+    '''
+    Fill the observations of all agents into preallocated numpy arrays, batched across agents.
+
+    The keys and shapes are:
+        rgb:            uint8   (agents, 3, height, width)
+        life_stats:     float32 (agents, len(LIFE_STATS_KEYS))
+        location_stats: float32 (agents, 11), pos (3), vel (3), then the rest of LOCATION_STATS_KEYS
+        voxels:         uint8   (agents, len(VOXEL_FLAG_KEYS), side, side, side), 1 if the flag is true
+        inventory:      int32   (agents, INVENTORY_SLOT_COUNT), the quantity in each slot
+        voxels_block_id: uint16 (agents, side, side, side), only with compact voxels, refer to BlockTable
+    where side = 2 * voxel_radius + 1.
+
+    The arrays are reused by the following calls of update(), copy them if you want to keep them.
+    '''
+
+    LIFE_STATS_KEYS = ["life", "oxygen", "food", "saturation", "is_sleeping", "xp", "xp_level", "xp_progress"]
+    LOCATION_STATS_KEYS = ["pos", "vel", "yaw", "pitch", "rainfall", "is_raining", "is_on_ground"]
+    VOXEL_FLAG_KEYS = ["is_collidable", "is_tool_not_required", "is_liquid", "is_solid", "blocks_light"]
+    INVENTORY_SLOT_COUNT = 36
+
+    def __init__(
+        self,
+        agents_count: int,
+        image_size: Tuple[int, int],
+        voxel_radius: int = 1,
+        enable_compact_voxels: bool = False,
+    ):
+        '''
+        Args:
+            agents_count (int): The number of agents.
+            image_size (Tuple[int, int]): The size of rgb, (height, width).
+            voxel_radius (int): The radius of voxels.
+            enable_compact_voxels (bool): Whether voxels are compact, which provides voxels_block_id.
+        '''
+        self.agents_count = agents_count
+        self.image_size = image_size
+        self.voxel_radius = voxel_radius
+        self.enable_compact_voxels = enable_compact_voxels
+        height, width = image_size
+        side = 2 * voxel_radius + 1
+        self.buffers = {
+            "rgb": np.zeros((agents_count, 3, height, width), dtype=np.uint8),
+            "life_stats": np.zeros((agents_count, len(self.LIFE_STATS_KEYS)), dtype=np.float32),
+            "location_stats": np.zeros((agents_count, 11), dtype=np.float32),
+            "voxels": np.zeros((agents_count, len(self.VOXEL_FLAG_KEYS), side, side, side), dtype=np.uint8),
+            "inventory": np.zeros((agents_count, self.INVENTORY_SLOT_COUNT), dtype=np.int32),
+        }
+        if enable_compact_voxels:
+            self.buffers["voxels_block_id"] = np.zeros((agents_count, side, side, side), dtype=np.uint16)
+
+        # The bits of VOXEL_FLAG_KEYS in compact voxels, shaped for broadcasting
+        self.voxel_flag_bits = np.array([VOXEL_FLAGS[key] for key in self.VOXEL_FLAG_KEYS], dtype=np.uint8).reshape(-1, 1, 1, 1)
+
+    @staticmethod
+    def space(
+        agents_count: int,
+        image_size: Tuple[int, int],
+        voxel_radius: int = 1,
+        enable_compact_voxels: bool = False,
+    ) -> gym.spaces.Dict:
+        height, width = image_size
+        side = 2 * voxel_radius + 1
+        spaces = {
+            "rgb": gym.spaces.Box(0, 255, (agents_count, 3, height, width), dtype=np.uint8),
+            "life_stats": gym.spaces.Box(-np.inf, np.inf, (agents_count, len(StructuredObservation.LIFE_STATS_KEYS)), dtype=np.float32),
+            "location_stats": gym.spaces.Box(-np.inf, np.inf, (agents_count, 11), dtype=np.float32),
+            "voxels": gym.spaces.MultiBinary((agents_count, len(StructuredObservation.VOXEL_FLAG_KEYS), side, side, side)),
+            "inventory": gym.spaces.Box(0, 64, (agents_count, StructuredObservation.INVENTORY_SLOT_COUNT), dtype=np.int32),
+        }
+        if enable_compact_voxels:
+            spaces["voxels_block_id"] = gym.spaces.Box(0, 65535, (agents_count, side, side, side), dtype=np.uint16)
+        return gym.spaces.Dict(spaces)
+
+    def update(self, obs: List[Observation]) -> Dict[str, np.ndarray]:
+        '''
+        Fill the observations into the arrays. The rows of disconnected agents are filled with zeros.
+        '''
+        if len(obs) != self.agents_count:
+            # Agents are added, reallocate the arrays
+            self.__init__(len(obs), self.image_size, self.voxel_radius, self.enable_compact_voxels)
+
+        for i, ob in enumerate(obs):
+            if ob is None:
+                for buffer in self.buffers.values():
+                    buffer[i] = 0
+                continue
+
+            # === RGB ===
+            rgb = ob.rgb
+            if rgb is not None and rgb.shape == self.buffers["rgb"].shape[1:]:
+                self.buffers["rgb"][i] = rgb
+            else:
+                # headless mode or rgb_decode_mode="never"
+                self.buffers["rgb"][i] = 0
+
+            # === Life Statistics ===
+            life_stats = ob.life_stats
+            self.buffers["life_stats"][i] = [life_stats[key] for key in self.LIFE_STATS_KEYS]
+
+            # === Location Statistics ===
+            location_stats = ob.location_stats
+            self.buffers["location_stats"][i, 0:3] = location_stats["pos"]
+            self.buffers["location_stats"][i, 3:6] = location_stats["vel"]
+            self.buffers["location_stats"][i, 6:] = [location_stats[key] for key in self.LOCATION_STATS_KEYS[2:]]
+
+            # === Voxels ===
+            if self.enable_compact_voxels:
+                self.buffers["voxels"][i] = (ob.voxels["flags"] & self.voxel_flag_bits) > 0
+                self.buffers["voxels_block_id"][i] = ob.voxels["block_id"]
+            else:
+                # None (unloaded block) is converted to nan, which is not greater than 0
+                for k, key in enumerate(self.VOXEL_FLAG_KEYS):
+                    self.buffers["voxels"][i, k] = np.array(ob.voxels[key], dtype=np.float32) > 0
+
+            # === Inventory ===
+            quantity = ob.inventory["quantity"][:self.INVENTORY_SLOT_COUNT]
+            self.buffers["inventory"][i, :len(quantity)] = [q or 0 for q in quantity]
+            self.buffers["inventory"][i, len(quantity):] = 0
+
+        return self.buffers
+
+class StructuredObservationWrapper(gym.Wrapper):
+    '''
+    Return the observations of MineLand (or a task) as a dict of numpy arrays, see StructuredObservation.
+
+    Example:
+        >>> mland = mineland.StructuredObservationWrapper(mineland.MineLand(agents_count=2, ...))
+        >>> obs = mland.reset()
+        >>> obs["life_stats"].shape    # (2, 8)
+    '''
+    def __init__(self, env: gym.Env):
+        super().__init__(env)
+        self.structured_observation = StructuredObservation(env.agents_count, env.image_size, env.voxel_radius, env.enable_compact_voxels)
+        self.observation_space = StructuredObservation.space(env.agents_count, env.image_size, env.voxel_radius, env.enable_compact_voxels)
+
+    def reset(self, soft=False):
+        obs = self.env.reset(soft=soft)
+        return self.structured_observation.update(obs)
+
+    def step(self, action):
+        obs, code_info, event, done, task_info = self.env.step(action)
+        return self.structured_observation.update(obs), code_info, event, done, task_info
+
+    async def areset(self, soft=False):
+        obs = await self.env.areset(soft=soft)
+        return self.structured_observation.update(obs)
+
+    async def astep(self, action):
+        obs, code_info, event, done, task_info = await self.env.astep(action)
+        return self.structured_observation.update(obs), code_info, event, done, task_info
+
+    async def aclose(self):
+        return await self.env.aclose()
+
+    def __getattr__(self, name):
+        return getattr(self.env, name)
@@ -0,0 +1,120 @@
+'''
+VectorMineLand is used to run several isolated MineLand environments on the same host.
+'''
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple, Union
+
+import gymnasium as gym
+import numpy as np
+
+from .sim import MineLand
+from .structured_observation import StructuredObservationWrapper
+from .data import Action
+from .data import LowLevelAction
+from .data import LowLevelActionBatch
+from .data import Observation
+from .data import CodeInfo
+from .data import Event
+from .data import TaskInfo
+from ..utils import get_free_ports
+
+class VectorMineLand:
+    def __init__(
+        self,
+        num_envs: int,
+        env_fn: Callable[..., gym.Env] = MineLand,
+        instances_dir: str = None,
+        enable_structured_observation: bool = False,
+        **kwargs,
+    ):
+        '''
+        Launch `num_envs` environments, each of them has its own minecraft server and mineflayer,
+        with allocated ports and an isolated server directory.
+
+        By default, the results of all environments are returned as lists of length num_envs.
+        With enable_structured_observation, the observations are batched into a dict of numpy arrays
+        of shape (num_envs, agents, ...), see StructuredObservation, and the low-level actions
+        can be given as an int array of shape (num_envs, agents, 8).
+
+        Args:
+            num_envs (int): The number of environments.
+            env_fn (Callable): The function to create an environment from kwargs, e.g. MineLand or mineland.make.
+            instances_dir (str): The directory to store the server instances.
+                                 Default is `mineland/sim/server/instances`.
+            enable_structured_observation (bool): Whether to batch the observations into numpy arrays.
+            kwargs: The arguments passed to env_fn.
+        '''
+        if 'server_host' in kwargs or 'server_port' in kwargs:
+            raise ValueError("server_host and server_port should not be provided in VectorMineLand!\nBecause each environment launches its own server.")
+
+        if instances_dir is None:
+            instances_dir = os.path.join(os.path.dirname(__file__), 'server', 'instances')
+
+        self.num_envs = num_envs
+        self.enable_structured_observation = enable_structured_observation
+        ports = get_free_ports(2 * num_envs)
+        self.env_kwargs = []
+        for i in range(num_envs):
+            self.env_kwargs.append({
+                **kwargs,
+                "local_server_port": ports[2 * i],
+                "mineflayer_port": ports[2 * i + 1],
+                "instance_dir": os.path.join(instances_dir, f"env_{i}"),
+            })
+
+        # Environments are I/O bound (processes and HTTP), so threads are enough to run them in parallel.
+        self.executor = ThreadPoolExecutor(max_workers=num_envs)
+        self.envs = list(self.executor.map(lambda env_kwargs: env_fn(**env_kwargs), self.env_kwargs))
+
+        # ===== Spaces =====
+        self.action_space = gym.vector.utils.batch_space(self.envs[0].action_space, num_envs)
+        if enable_structured_observation:
+            self.envs = [StructuredObservationWrapper(env) for env in self.envs]
+            self.observation_space = gym.vector.utils.batch_space(self.envs[0].observation_space, num_envs)
+
+    def __len__(self):
+        return self.num_envs
+
+    def reset(self) -> Union[List[List[Observation]], Dict[str, np.ndarray]]:
+        '''Reset all environments in parallel.
+
+        Returns:
+            The observations of each environment, or a dict of numpy arrays with enable_structured_observation.
+        '''
+        obs = list(self.executor.map(lambda env: env.reset(), self.envs))
+        return self._batch_observations(obs)
+
+    def step(
+        self,
+        actions: Union[List[List[Union[Action, LowLevelAction]]], List[LowLevelActionBatch], np.ndarray],
+    ) -> Tuple[Union[List[List[Observation]], Dict[str, np.ndarray]], List[List[CodeInfo]], List[List[Event]], List[bool], List[TaskInfo]]:
+        '''Step all environments in parallel.
+
+        Args:
+            actions: The actions of each environment.
+                     In low-level action mode, it can also be an int array of shape (num_envs, agents, 8).
+
+        Returns:
+            Tuple: The results of step, each element is a list of length num_envs,
+                   except that observations are a dict of numpy arrays with enable_structured_observation.
+        '''
+        if len(actions) != self.num_envs:
+            raise ValueError(f"The length of actions ({len(actions)}) does not equal to num_envs ({self.num_envs}).")
+        if isinstance(actions, np.ndarray):
+            actions = [LowLevelActionBatch(action) for action in actions]
+
+        results = list(self.executor.map(lambda env, action: env.step(action), self.envs, actions))
+        obs, code_info, event, done, task_info = zip(*results)
+        return self._batch_observations(list(obs)), list(code_info), list(event), list(done), list(task_info)
+
+    def _batch_observations(self, obs):
+        if not self.enable_structured_observation:
+            return obs
+        # The arrays of each environment are reused by its next step, so they are copied by stacking
+        return {key: np.stack([ob[key] for ob in obs]) for key in obs[0]}
+
+    def close(self):
+        list(self.executor.map(lambda env: env.close(), self.envs))
+        self.executor.shutdown()
@@ -0,0 +1,147 @@
+'''
+WorldSnapshot is used to restore the world of the server from a template world.
+'''
+
+import hashlib
+import json
+import os
+import shutil
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# ioctl request of Linux to clone a file by reflink (copy-on-write), on btrfs / xfs / etc.
+FICLONE = 0x40049409
+
+class WorldSnapshot:
+    '''
+    Restore a world directory (dst) from a template world directory (src).
+
+    The first restoration clones the whole template, by reflink (copy-on-write) if the file system supports it,
+    otherwise by copying. The state of every restored file is recorded in a manifest inside dst,
+    with a content hash of the template, so that dst is rebuilt when the template is edited.
+    The following restorations only copy back the files which have been touched by the server since then
+    (usually a few region files), and remove the files created by the server.
+
+    Hardlinks are not used, because the server writes region files in place, which would modify the template.
+    '''
+
+    MANIFEST_NAME = '.mineland_snapshot.json'
+
+    # Region files (.mca) are hashed by their headers, the chunk locations and timestamps, which change
+    # whenever a chunk is saved. Other files (level.dat, etc.) are small, and hashed entirely.
+    REGION_HEADER_SIZE = 8192
+
+    def __init__(self, src: str, dst: str):
+        self.src = src
+        self.dst = dst
+
+    def restore(self) -> int:
+        '''
+        Restore dst from src. The server must not be running.
+
+        Returns:
+            int: The number of files copied.
+        '''
+        src_files = self.list_files(self.src)
+        fingerprint = self.fingerprint(self.src, src_files)
+        manifest = self.load_manifest()
+
+        if manifest is None or manifest["fingerprint"] != fingerprint:
+            # The template is changed, or dst is not created by WorldSnapshot
+            if os.path.exists(self.dst):
+                shutil.rmtree(self.dst)
+            manifest = {"fingerprint": fingerprint, "files": {}}
+
+        dst_files = self.list_files(self.dst) if os.path.exists(self.dst) else {}
+
+        # Remove the files created by the server
+        for rel_path in dst_files:
+            if rel_path not in src_files:
+                os.remove(os.path.join(self.dst, rel_path))
+
+        # Copy the files which are missing or touched
+        copied_count = 0
+        for rel_path in src_files:
+            recorded = manifest["files"].get(rel_path)
+            if rel_path in dst_files and recorded is not None and dst_files[rel_path] == tuple(recorded):
+                continue
+            dst_path = os.path.join(self.dst, rel_path)
+            os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+            self.clone_file(os.path.join(self.src, rel_path), dst_path)
+            copied_count += 1
+
+        manifest["files"] = self.list_files(self.dst)
+        self.save_manifest(manifest)
+        return copied_count
+
+    @staticmethod
+    def list_files(root: str):
+        '''
+        Get all files in root.
+
+        Returns:
+            Dict[str, Tuple[int, int]]: relative path -> (size, mtime_ns)
+        '''
+        files = {}
+        for dir_path, _, file_names in os.walk(root):
+            for file_name in file_names:
+                if file_name == WorldSnapshot.MANIFEST_NAME:
+                    continue
+                path = os.path.join(dir_path, file_name)
+                stat = os.stat(path)
+                files[os.path.relpath(path, root)] = (stat.st_size, stat.st_mtime_ns)
+        return files
+
+    @staticmethod
+    def fingerprint(root: str, files) -> str:
+        '''
+        Get the hash of a world from the paths, sizes and contents of its files (the headers of region files),
+        so that a world edited in place is detected even if the sizes and modified times are kept (e.g. by `cp -p`).
+        '''
+        sha1 = hashlib.sha1()
+        for rel_path in sorted(files):
+            size, _ = files[rel_path]
+            sha1.update(f"{rel_path}\0{size}\n".encode('utf-8'))
+            with open(os.path.join(root, rel_path), 'rb') as f:
+                if rel_path.endswith('.mca'):
+                    sha1.update(f.read(WorldSnapshot.REGION_HEADER_SIZE))
+                else:
+                    for block in iter(lambda: f.read(1 << 20), b''):
+                        sha1.update(block)
+        return sha1.hexdigest()
+
+    @staticmethod
+    def clone_file(src: str, dst: str):
+        '''
+        Clone a file by reflink if possible, otherwise copy it.
+        The modified time is kept, so that the file can be checked whether it's touched later.
+        '''
+        if os.path.exists(dst):
+            os.remove(dst)
+        if fcntl is not None:
+            try:
+                with open(src, 'rb') as src_file, open(dst, 'wb') as dst_file:
+                    fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+                shutil.copystat(src, dst)
+                return
+            except OSError:
+                pass
+        shutil.copy2(src, dst)
+
+    def load_manifest(self):
+        path = os.path.join(self.dst, self.MANIFEST_NAME)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save_manifest(self, manifest):
+        os.makedirs(self.dst, exist_ok=True)
+        with open(os.path.join(self.dst, self.MANIFEST_NAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
@@ -1,8 +1,7 @@
 from typing import List, Dict, Union
-from omegaconf import OmegaConf
-import importlib
 
 from .utils import *
+from .task_registry import TaskSet, TaskRegistry
 
 from .base_task import BaseTask
 from .survival_task import SurvivalTask
@@ -13,6 +12,8 @@ from .playthrough_task import PlaythroughTask
 from .creative_task import CreativeTask
 from .construction_task import ConstructionTask
 from .stage_performance_task import StagePerformanceTask
+from ..sim import VectorMineLand
+from ..sim import StructuredObservationWrapper
 
 # ===== Main Make =====
 
@@ -21,6 +22,8 @@ def make(**kwargs):
 
     Args:
         task_id (str): The id of the task.
+        enable_structured_observation (bool): If True, return the observations as a dict of numpy arrays,
+                                              see StructuredObservationWrapper.
 
     Example:
         >>> env = mineland.make("playground", agents_count=1, agents_config=[{"name": "MineflayerBot0"}])
@@ -36,6 +39,8 @@ def make(**kwargs):
 
     if 'task_id' not in kwargs:
         raise ValueError("task_id must be provided in the arguments.")
+
+    enable_structured_observation = kwargs.pop('enable_structured_observation', False)
     
     def add_mode_argument():
         if 'mode' not in kwargs or (kwargs['mode'] != 'cooperative' and kwargs['mode'] != 'competitive'):
@@ -70,68 +75,56 @@ def make(**kwargs):
         env = _make_stage_performance(**kwargs)
     else:
         env = _make_creative(**kwargs)
+
+    if enable_structured_observation:
+        env = StructuredObservationWrapper(env)
     return env
 
+# ===== Vectorized Make =====
+
+def make_vec(num_envs: int, **kwargs):
+    '''Make several isolated task environments which step in parallel.
+    Each environment launches its own server and mineflayer on allocated ports.
+
+    Args:
+        num_envs (int): The number of environments.
+        kwargs: The arguments passed to `make`. With enable_structured_observation, the observations
+                of all environments are batched into numpy arrays, see VectorMineLand.
+
+    Example:
+        >>> envs = mineland.make_vec(num_envs=4, task_id="playground", agents_count=1)
+        >>> obs = envs.reset()      # obs[i] is the observations of the i-th environment
+    '''
+    return VectorMineLand(num_envs, env_fn=make, **kwargs)
+
 # ===== Load Datas =====
 
-def _resource_file_path(fname) -> str:
-    with importlib.resources.path("mineland.tasks.description_files", fname) as p:
-        return str(p)
-
-# load survival tasks
-SURVIVAL_TASKS = OmegaConf.load(
-    _resource_file_path("survival_tasks.yaml")
-)
-# check no duplicates
-assert len(set(SURVIVAL_TASKS.keys())) == len(SURVIVAL_TASKS)
-
-# load harvest tasks
-HARVEST_TASKS = OmegaConf.load(
-    _resource_file_path("harvest_tasks.yaml")
-)
-# check no duplicates
-assert len(set(HARVEST_TASKS.keys())) == len(HARVEST_TASKS)
-
-# load tech tree tasks
-TECHTREE_TASKS = OmegaConf.load(
-    _resource_file_path("techtree_tasks.yaml")
-)
-# check no duplicates
-assert len(set(TECHTREE_TASKS.keys())) == len(TECHTREE_TASKS)
-
-# load tech tree tasks
-COMBAT_TASKS = OmegaConf.load(
-    _resource_file_path("combat_tasks.yaml")
-)
-# check no duplicates
-
-assert len(set(COMBAT_TASKS.keys())) == len(COMBAT_TASKS)
-
-# load tech tree tasks
-CREATIVE_TASKS = OmegaConf.load(
-    _resource_file_path("creative_tasks.yaml")
-)
-# check no duplicates
-assert len(set(CREATIVE_TASKS.keys())) == len(CREATIVE_TASKS)
-
-# load construction tasks
-CONSTRUCTION_TASKS = OmegaConf.load(
-    _resource_file_path("construction_tasks.yaml")
-)
-# check no duplicates
-assert len(set(CONSTRUCTION_TASKS.keys())) == len(CONSTRUCTION_TASKS)
-
-# load stage performance tree tasks
-STAGE_PERFORMANCE_TASKS = OmegaConf.load(
-    _resource_file_path("stage_performance_tasks.yaml")
-)
-# check no duplicates
-assert len(set(STAGE_PERFORMANCE_TASKS.keys())) == len(STAGE_PERFORMANCE_TASKS)
-
-# print("HARVEST_TASKS: ", HARVEST_TASKS)
-# print("TECHTREE_TASKS: ", TECHTREE_TASKS)
-# print("COMBAT_TASKS: ", COMBAT_TASKS)
-# print("CREATIVE_TASKS: ", CREATIVE_TASKS)
+# The task description files are loaded on the first lookup, refer to TaskSet
+SURVIVAL_TASKS = TaskSet("survival_tasks.yaml")
+HARVEST_TASKS = TaskSet("harvest_tasks.yaml")
+TECHTREE_TASKS = TaskSet("techtree_tasks.yaml")
+COMBAT_TASKS = TaskSet("combat_tasks.yaml")
+CREATIVE_TASKS = TaskSet("creative_tasks.yaml")
+CONSTRUCTION_TASKS = TaskSet("construction_tasks.yaml")
+STAGE_PERFORMANCE_TASKS = TaskSet("stage_performance_tasks.yaml")
+
+TASK_REGISTRY = TaskRegistry([
+    SURVIVAL_TASKS,
+    HARVEST_TASKS,
+    TECHTREE_TASKS,
+    COMBAT_TASKS,
+    CREATIVE_TASKS,
+    CONSTRUCTION_TASKS,
+    STAGE_PERFORMANCE_TASKS,
+])
+
+def list_tasks(prefix: str = "") -> List[str]:
+    '''List the ids of tasks which start with prefix.
+
+    Example:
+        >>> mineland.list_tasks("harvest_1_")
+    '''
+    return TASK_REGISTRY.with_prefix(prefix)
 
 # ===== Playground =====
 
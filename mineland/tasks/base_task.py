@@ -1,4 +1,5 @@
 import gymnasium as gym
+import asyncio
 
 from ..sim import MineLand
 from .utils import *
@@ -14,8 +15,8 @@ class BaseTask(gym.Wrapper):
         env = MineLand(**kwargs)
         super().__init__(env)
 
-    def reset(self):
-        obs = self.env.reset()
+    def reset(self, soft=False):
+        obs = self.env.reset(soft=soft)
         return obs
 
     def step(self, action):
@@ -28,6 +29,17 @@ class BaseTask(gym.Wrapper):
     def close(self):
         return self.env.close()
 
+    # The task logic of subclasses is written in synchronous step() and reset(),
+    # so the asynchronous versions run them in a worker thread, which doesn't block the event loop.
+    async def areset(self, soft=False):
+        return await asyncio.to_thread(self.reset, soft)
+
+    async def astep(self, action):
+        return await asyncio.to_thread(self.step, action)
+
+    async def aclose(self):
+        return await asyncio.to_thread(self.close)
+
     def seed(self, seed=None):
         assert False, "Does not support seed."
 
@@ -28,8 +28,10 @@ class CombatTask(BaseTask):
         
         print(f'{self.agents_count} Agent(s) need to defeat {self.num_of_target} x {self.target} ')
 
-    def reset(self):
-        obs = self.env.reset()
+    def reset(self, soft=False):
+        obs = self.env.reset(soft=soft)
+        self.has_defeated = 0
+        self.is_alive = [True for _ in range(self.agents_count)]
 
         self.server_manager.execute('difficulty normal')
 
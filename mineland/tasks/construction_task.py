@@ -85,10 +85,11 @@ class ConstructionTask(BaseTask):
         super().__init__(**kwargs)
         print(f'agent(s) need to build a construction like the picture')
     
-    def reset(self):
-        obs = self.env.reset()
+    def reset(self, soft=False):
+        obs = self.env.reset(soft=soft)
         # self.server_manager.execute("gamemode creative")
-        self.env.bridge.addCamera("construction_camera")
+        if "construction_camera" not in self.env.bridge.camera_set:
+            self.env.bridge.addCamera("construction_camera")
         return obs
     
     def __load_img(self, path):
@@ -167,17 +168,21 @@ class ConstructionTask(BaseTask):
     def get_camera_view(self) :
         return self.env.bridge.getCameraView("construction_camera")
 
+    def get_camera_image(self) :
+        rgb = self.env.bridge.getCameraImage("construction_camera")
+        if rgb is None:
+            return base64_to_image("", 320, 180)
+        return rgb
+
     def get_score(self) :
-        camera_view = self.get_camera_view()
-        camera_view = base64_to_image(camera_view, 320, 180)
+        camera_view = self.get_camera_image()
         score = get_image_similarity_by_orb(camera_view, self.blueprint_img_np) / self.baseline_score
         return score
     
     def get_score_by_mineclip(self):
         if not self.enable_mineclip:
             raise ValueError("MineCLIP is not enabled. Please use `enable_mineclip=True` when creating the task.")
-        camera_view = self.get_camera_view()
-        camera_view = base64_to_image(camera_view, 320, 180)
+        camera_view = self.get_camera_image()
         camera_view = np.transpose(camera_view, (1, 2, 0))
         score = self.get_image_correlation_by_mineclip(camera_view, self.goal) / self.baseline_score_mineclip
         return score
@@ -21,8 +21,8 @@ class CreativeTask(BaseTask):
         if guidance :
             print(f"guidance is : {guidance}")
 
-    def reset(self):
-        obs = self.env.reset()
+    def reset(self, soft=False):
+        obs = self.env.reset(soft=soft)
         for tool, number in self.initial_inventory.items() :
             self.server_manager.execute(f"give @a minecraft:{tool} {number}")
         return obs
@@ -29,8 +29,9 @@ class HarvestTask(BaseTask):
         self.mode = mode
         print(f'{self.agents_count} Agent(s) need to harvest {self.num_of_target_item} x {self.target_item}')
 
-    def reset(self):
-        obs = self.env.reset()
+    def reset(self, soft=False):
+        obs = self.env.reset(soft=soft)
+        self.has_gotten_last = [0] * self.agents_count
 
         # Give tools to agents
         # if self.tool is not None:
@@ -16,8 +16,8 @@ class PlaythroughTask(BaseTask):
         self.mode = mode
         print(f'{self.agents_count} Agent(s) need to defeat the ENDER DRAGON and beat the game!!!') 
 
-    def reset(self):
-        obs = self.env.reset()
+    def reset(self, soft=False):
+        obs = self.env.reset(soft=soft)
         return obs
     
     def step(self, action):
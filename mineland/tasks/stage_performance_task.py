@@ -47,8 +47,8 @@ class StagePerformanceTask(BaseTask):
         super().__init__(**kwargs)
         print(f'stage performance \n ')
     
-    def reset(self):
-        obs = self.env.reset()
+    def reset(self, soft=False):
+        obs = self.env.reset(soft=soft)
         self.last_obs = obs
         for instruction in self.system_instructions:
             self.server_manager.execute(instruction)
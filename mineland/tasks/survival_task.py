@@ -24,8 +24,8 @@ class SurvivalTask(BaseTask):
         print(f'Agent(s) need to survive for {self.survival_target_day} days ({self.survival_target_day * 24000} ticks)')
         super().__init__(**kwargs)
 
-    def reset(self):
-        obs = self.env.reset()
+    def reset(self, soft=False):
+        obs = self.env.reset(soft=soft)
         self.server_manager.execute('difficulty normal')
         if self.mode == 'cooperative' :
             self.start_tick = obs[0].age
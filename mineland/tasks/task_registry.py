@@ -0,0 +1,195 @@
+'''
+TaskSet loads a task description file lazily on the first lookup, and caches its compiled index,
+so that importing mineland doesn't parse the yaml files.
+'''
+
+import bisect
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections.abc import Mapping
+from typing import List
+
+DESCRIPTION_FILES_DIR = os.path.join(os.path.dirname(__file__), 'description_files')
+
+CACHE_VERSION = 1
+
+def get_cache_dir() -> str:
+    '''
+    The directory of compiled indices. It can be set by the environment variable MINELAND_CACHE_DIR.
+    '''
+    if "MINELAND_CACHE_DIR" in os.environ:
+        return os.path.join(os.environ["MINELAND_CACHE_DIR"], "tasks")
+    cache_home = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(cache_home, "mineland", "tasks")
+
+class TaskSet(Mapping):
+    '''
+    A read-only mapping from task id to task description (DictConfig) of a yaml file.
+
+    Two caches are written for each file, keyed by its modified time and size:
+        <name>.ids.json: the sorted task ids, which is enough for `in`, iteration and prefix queries.
+        <name>.pickle:   the task descriptions, which is loaded on the first access of a task.
+    If the cache directory is not writable, the file is parsed in every process instead.
+    '''
+
+    def __init__(self, file_name: str, cache_dir: str = None):
+        self.file_name = file_name
+        self.path = os.path.join(DESCRIPTION_FILES_DIR, file_name)
+        self.cache_dir = cache_dir
+        self._ids = None
+        self._tasks = None
+        self._lock = threading.Lock()
+
+    # ===== Mapping =====
+
+    def __getitem__(self, task_id: str):
+        from omegaconf import OmegaConf
+        tasks = self.tasks()
+        if task_id not in tasks:
+            raise KeyError(task_id)
+        return OmegaConf.create(tasks[task_id])
+
+    def __contains__(self, task_id) -> bool:
+        if not isinstance(task_id, str):
+            return False
+        ids = self.ids()
+        i = bisect.bisect_left(ids, task_id)
+        return i < len(ids) and ids[i] == task_id
+
+    def __iter__(self):
+        return iter(self.ids())
+
+    def __len__(self) -> int:
+        return len(self.ids())
+
+    def __repr__(self) -> str:
+        if self._ids is None:
+            return f"TaskSet({self.file_name}, not loaded)"
+        return f"TaskSet({self.file_name}, {len(self._ids)} tasks)"
+
+    def with_prefix(self, prefix: str) -> List[str]:
+        '''
+        Get the ids of tasks which start with prefix, in sorted order.
+        '''
+        ids = self.ids()
+        start = bisect.bisect_left(ids, prefix)
+        end = start
+        while end < len(ids) and ids[end].startswith(prefix):
+            end += 1
+        return ids[start:end]
+
+    # ===== Loading =====
+
+    def ids(self) -> List[str]:
+        if self._ids is None:
+            with self._lock:
+                if self._ids is None:
+                    index = self._load_cache(self._cache_path(".ids.json"), json_format=True)
+                    if index is not None:
+                        self._ids = index["ids"]
+                    else:
+                        self._compile()
+        return self._ids
+
+    def tasks(self):
+        '''
+        Get all task descriptions as plain python containers, task id -> dict.
+        '''
+        if self._tasks is None:
+            with self._lock:
+                if self._tasks is None:
+                    index = self._load_cache(self._cache_path(".pickle"), json_format=False)
+                    if index is not None:
+                        self._tasks = index["tasks"]
+                        if self._ids is None:
+                            self._ids = sorted(self._tasks)
+                    else:
+                        self._compile()
+        return self._tasks
+
+    def _compile(self):
+        from omegaconf import OmegaConf
+        stat = os.stat(self.path)
+        tasks = OmegaConf.to_container(OmegaConf.load(self.path), resolve=True)
+        # check no duplicates
+        assert len(set(tasks.keys())) == len(tasks)
+
+        self._tasks = tasks
+        self._ids = sorted(tasks)
+
+        header = {"version": CACHE_VERSION, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+        self._save_cache(self._cache_path(".ids.json"), {**header, "ids": self._ids}, json_format=True)
+        self._save_cache(self._cache_path(".pickle"), {**header, "tasks": tasks}, json_format=False)
+
+    def _cache_path(self, suffix: str) -> str:
+        cache_dir = self.cache_dir if self.cache_dir is not None else get_cache_dir()
+        # Different installations of mineland have their own caches
+        path_hash = hashlib.sha1(os.path.abspath(self.path).encode('utf-8')).hexdigest()[:12]
+        name = os.path.splitext(self.file_name)[0]
+        return os.path.join(cache_dir, f"{name}-{path_hash}{suffix}")
+
+    def _load_cache(self, cache_path: str, json_format: bool):
+        try:
+            if json_format:
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+            else:
+                with open(cache_path, 'rb') as f:
+                    index = pickle.load(f)
+            stat = os.stat(self.path)
+        except (OSError, ValueError, pickle.UnpicklingError, EOFError):
+            return None
+        if (index.get("version") != CACHE_VERSION
+            or index.get("mtime_ns") != stat.st_mtime_ns
+            or index.get("size") != stat.st_size):
+            return None
+        return index
+
+    def _save_cache(self, cache_path: str, index, json_format: bool):
+        # Write to a temporary file then rename, so that other processes never read a partial cache
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            if json_format:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(index, f)
+            else:
+                with open(tmp_path, 'wb') as f:
+                    pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+class TaskRegistry:
+    '''
+    The task sets of all kinds of tasks, which can be queried by task id or prefix.
+    '''
+
+    def __init__(self, task_sets: List[TaskSet]):
+        self.task_sets = task_sets
+
+    def __contains__(self, task_id: str) -> bool:
+        return any(task_id in task_set for task_set in self.task_sets)
+
+    def get(self, task_id: str):
+        '''
+        Get the description of a task, or None if it doesn't exist.
+        '''
+        for task_set in self.task_sets:
+            if task_id in task_set:
+                return task_set[task_id]
+        return None
+
+    def with_prefix(self, prefix: str = "") -> List[str]:
+        '''
+        Get the ids of tasks which start with prefix, in sorted order.
+        Only the id indices are loaded, not the task descriptions.
+        '''
+        ids = []
+        for task_set in self.task_sets:
+            ids += task_set.with_prefix(prefix)
+        return sorted(ids)
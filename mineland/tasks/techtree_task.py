@@ -31,8 +31,9 @@ class TechtreeTask(BaseTask):
         # print(initial_inventory)
         print(f'{self.agents_count} Agent(s) need to get {self.num_of_target_item} x {self.target_item}')
         # print(goal)
-    def reset(self):
-        obs = self.env.reset()
+    def reset(self, soft=False):
+        obs = self.env.reset(soft=soft)
+        self.has_gotten_last = [0] * self.agents_count
 
         # Give tools to agents
         # if self.tool is not None:
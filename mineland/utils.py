@@ -1,6 +1,7 @@
 from PIL import Image
 import numpy as np
 import base64
+import socket
 import io
 import cv2
 
@@ -33,6 +34,21 @@ def cyan_text(text):
 def white_text(text):
     return colored_text(text, "37")
 
+# ===== Network =====
+
+def get_free_ports(count):
+    '''Ask the OS for `count` distinct free TCP ports on localhost.'''
+    sockets = []
+    try:
+        for _ in range(count):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.bind(("localhost", 0))
+            sockets.append(sock)
+        return [sock.getsockname()[1] for sock in sockets]
+    finally:
+        for sock in sockets:
+            sock.close()
+
 # ===== Convert base64 to image =====
 
 def base64_to_image(value, rgb_width, rgb_height):
@@ -40,7 +56,10 @@ def base64_to_image(value, rgb_width, rgb_height):
         rgb = np.zeros((3, rgb_width, rgb_height))
         return rgb
 
-    img = Image.open(io.BytesIO(base64.b64decode(value)))
+    return bytes_to_image(base64.b64decode(value))
+
+def bytes_to_image(value):
+    img = Image.open(io.BytesIO(value))
     if img.mode != "RGB":
         img = img.convert("RGB")
     
@@ -44,25 +44,18 @@ class WrapperEnv(gym.Env):
         return np.array(combined, dtype=np.float32)
     
     def reset(self, seed=0):
-        self.mland.close()
-        self.mland = mineland.make(
-            task_id='combat_1_zombie',
-            agents_count = AGENT_COUNT,
-            agents_config = AGENT_CONFIG,
-            headless = True,
-            enable_low_level_action = True,
-        )
-        _ = self.mland.reset()
+        # Soft reset keeps the server and mineflayer running between episodes
+        _ = self.mland.reset(soft=True)
         self.score = 0
         return np.zeros(self.obs_length, dtype=np.float32), {}
     
     def step(self, action):
         print(action)
-        new_actions = mineland.LowLevelAction.no_op(AGENT_COUNT)
+        new_actions = mineland.LowLevelActionBatch.no_op(AGENT_COUNT)
         if action < 3:
-            new_actions[0][0] = int(action) # move
+            new_actions[0, 0] = int(action) # move
         else:
-            new_actions[0][5] = 3      # attack
+            new_actions[0, 5] = 3      # attack
 
         obs, _, event, done, _ = self.mland.step(action=new_actions)
 